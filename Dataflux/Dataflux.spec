@@ -1,4 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
+import sys
 
 
 a = Analysis(
@@ -10,9 +11,9 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets', 'PySide6.QtQuick', 'PySide6.QtQml', 'PySide6.QtMultimedia', 'PySide6.QtNetwork', 'tkinter', 'distutils', 'lib2to3'],
     noarchive=False,
-    optimize=0,
+    optimize=2,
 )
 pyz = PYZ(a.pure)
 
@@ -24,7 +25,7 @@ exe = EXE(
     name='Dataflux',
     debug=False,
     bootloader_ignore_signals=False,
-    strip=False,
+    strip=sys.platform != "win32",
     upx=True,
     console=False,
     disable_windowed_traceback=False,
@@ -38,7 +39,7 @@ coll = COLLECT(
     exe,
     a.binaries,
     a.datas,
-    strip=False,
+    strip=sys.platform != "win32",
     upx=True,
     upx_exclude=[],
     name='Dataflux',
@@ -10,8 +10,32 @@ import shutil
 import subprocess
 import platform
 import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# ZIP圧縮の並列度（zlib は圧縮中に GIL を解放するのでスレッドで並列化できる）
+ZIP_WORKERS = os.cpu_count() or 1
+ZIP_COMPRESS_LEVEL = 6
+
+# 使用していないモジュール（バンドルを小さくし起動時の読み込みを減らす）
+PYINSTALLER_EXCLUDES = [
+    "PySide6.QtWebEngineCore",
+    "PySide6.QtWebEngineWidgets",
+    "PySide6.QtQuick",
+    "PySide6.QtQml",
+    "PySide6.QtMultimedia",
+    "PySide6.QtNetwork",
+    "tkinter",
+    "distutils",
+    "lib2to3",
+]
+
+# Cython でビルドする任意の高速化モジュール（ビルドできなければ純 Python 版にフォールバック）
+CYTHON_MODULES = [
+    Path("core/_scanner_inner.pyx"),
+]
+
 def get_platform_info():
     """プラットフォーム情報を取得"""
     system = platform.system().lower()
@@ -63,6 +87,26 @@ def prepare_assets():
     
     return target_icon.exists()
 
+def build_cython_extensions():
+    """Cython 拡張（任意）をその場でビルド。Cython が無ければ純 Python 版のまま続行"""
+    try:
+        import Cython  # noqa: F401
+    except ImportError:
+        print("ℹ️  Cython not installed, skipping compiled extensions")
+        return False
+    
+    for pyx in CYTHON_MODULES:
+        cmd = [sys.executable, "-m", "Cython.Build.Cythonize", "-i", "-3", str(pyx)]
+        try:
+            subprocess.run(cmd, check=True)
+        except subprocess.CalledProcessError as e:
+            # C コンパイラが無い環境などでは純 Python 版で続行
+            print(f"⚠️  Failed to build {pyx}: {e}")
+            return False
+    
+    print("✅ Compiled extensions built")
+    return True
+
 def build_with_pyinstaller():
     """PyInstaller でビルド実行"""
     platform_name, app_name, icon_ext = get_platform_info()
@@ -72,9 +116,20 @@ def build_with_pyinstaller():
         "pyinstaller",
         "--noconfirm",
         "--windowed",
-        "--name", "Dataflux"
+        "--name", "Dataflux",
+        # バイトコードを -OO 相当で最適化（assert と docstring を除去）
+        "--optimize", "2",
     ]
     
+    # デバッグシンボル除去（Unix系のみ）
+    if platform.system().lower() != "windows":
+        cmd.append("--strip")
+    
+    # UPX の場所が指定されていれば圧縮に使用
+    upx_dir = os.environ.get("UPX_DIR")
+    if upx_dir:
+        cmd.extend(["--upx-dir", upx_dir])
+    
     # アイコン追加
     icon_path = Path(f"assets/icons/dataflux.{icon_ext}")
     if icon_path.exists():
@@ -107,6 +162,9 @@ def build_with_pyinstaller():
         "--hidden-import", "PySide6.QtGui",
         "--hidden-import", "PySide6.QtWidgets",
     ])
+    
+    for module in PYINSTALLER_EXCLUDES:
+        cmd.extend(["--exclude-module", module])
 
     # メインスクリプト
     cmd.append("main.py")
@@ -114,15 +172,25 @@ def build_with_pyinstaller():
     print("🔨 Building Dataflux with PyInstaller...")
     print(f"Command: {' '.join(cmd)}")
     
+    # 出力はメモリに溜めず1行ずつ表示（進捗がそのまま見える）
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print("✅ Build completed successfully!")
-        return True
-    except subprocess.CalledProcessError as e:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+    except OSError as e:
         print(f"❌ Build failed: {e}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
         return False
+    
+    with proc:
+        for line in proc.stdout:
+            print(line, end="")
+    
+    if proc.returncode != 0:
+        print(f"❌ Build failed: exit code {proc.returncode}")
+        return False
+    
+    print("✅ Build completed successfully!")
+    return True
 
 def create_distribution_files():
     """配布用ファイル作成"""
@@ -193,6 +261,48 @@ but applies specifically to the included FFmpeg components.
     Path("FFMPEG_LICENSE.txt").write_text(ffmpeg_license)
     print("✅ Distribution files created")
 
+def _compress_member(file_path, arc_path):
+    """ファイルを読み込み raw DEFLATE で圧縮（ワーカースレッドで実行）"""
+    zinfo = zipfile.ZipInfo.from_file(file_path, arc_path)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    
+    data = Path(file_path).read_bytes()
+    compressor = zlib.compressobj(ZIP_COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    
+    zinfo.file_size = len(data)
+    zinfo.compress_size = len(payload)
+    zinfo.CRC = zlib.crc32(data)
+    return zinfo, payload
+
+def _write_precompressed(zf, zinfo, payload):
+    """圧縮済みデータをそのままZIPに追記（ZipFile.open の書き込み処理と同じ手順）"""
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.write(payload)
+    zf.start_dir = zf.fp.tell()
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf._didModify = True
+
+def _add_tree_parallel(zf, root_dir, base_dir):
+    """root_dir 配下のファイルを並列圧縮してZIPに追加（書き込み順は走査順）"""
+    members = []
+    for root, dirs, files in os.walk(root_dir):
+        for file in files:
+            file_path = Path(root) / file
+            members.append((file_path, file_path.relative_to(base_dir)))
+    
+    # 圧縮済みデータを溜め込みすぎないよう、一定件数ずつ投入して順に書き出す
+    window = ZIP_WORKERS * 4
+    with ThreadPoolExecutor(max_workers=ZIP_WORKERS) as executor:
+        for start in range(0, len(members), window):
+            chunk = members[start:start + window]
+            for zinfo, payload in executor.map(lambda m: _compress_member(*m), chunk):
+                _write_precompressed(zf, zinfo, payload)
+
 def create_distribution_zip():
     """配布用ZIP作成"""
     platform_name, app_name, _ = get_platform_info()
@@ -218,20 +328,12 @@ def create_distribution_zip():
             app_path = dist_dir / "Dataflux.app"
             if app_path.exists():
                 # .app バンドル全体を追加
-                for root, dirs, files in os.walk(app_path):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arc_path = file_path.relative_to(dist_dir)
-                        zf.write(file_path, arc_path)
+                _add_tree_parallel(zf, app_path, dist_dir)
         else:
             # Windows/Linux
             app_dir = dist_dir / "Dataflux"  # フォルダ版
             if app_dir.exists():
-                for root, dirs, files in os.walk(app_dir):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arc_path = file_path.relative_to(dist_dir)
-                        zf.write(file_path, arc_path)
+                _add_tree_parallel(zf, app_dir, dist_dir)
         
         # 配布文書追加
         zf.write("README.md")
@@ -250,15 +352,19 @@ def main():
     if not check_ffprobe():
         sys.exit(1)
     
-    # 2. アセット準備  
-    prepare_assets()
-    
-    # 3. 配布文書作成
-    create_distribution_files()
-    
-    # 4. PyInstaller ビルド
-    if not build_with_pyinstaller():
-        sys.exit(1)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # 3. 配布文書作成（ZIP作成までに終わればよいのでビルドと並行して実行）
+        docs_future = executor.submit(create_distribution_files)
+        
+        # 2. アセット準備（アイコンはビルドで使うので先に完了させる）
+        prepare_assets()
+        
+        # 4. PyInstaller ビルド（先に任意の Cython 拡張を用意しておくと同梱される）
+        build_cython_extensions()
+        if not build_with_pyinstaller():
+            sys.exit(1)
+        
+        docs_future.result()
     
     # 5. 配布ZIP作成
     if not create_distribution_zip():
@@ -0,0 +1,112 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# -*- coding: utf-8 -*-
+"""
+FileScanner.scan_directory の走査・集計ループ（Cython 版）
+
+build_dataflux.py で Cython が使える場合にだけビルドされる。
+ビルドされていなければ core.scanner は純 Python の走査にフォールバックする。
+判定条件（隠しファイル除外、シンボリックリンクは辿らない、Path.suffix 相当の拡張子）は
+core/scanner.py の _iter_entries_python と同じ。
+"""
+
+import os
+import sys
+from time import monotonic
+
+
+def walk_and_tally(
+    root,
+    dict ext_to_idx,
+    Py_ssize_t other_idx,
+    bint need_size,
+    frozenset ignore,
+    list counts,
+    list sizes,
+    list exts,
+    list files,
+    list order,
+    is_cancelled,
+    progress,
+    Py_ssize_t progress_every,
+    double progress_interval,
+    Py_ssize_t cancel_mask,
+    Py_ssize_t time_check_mask,
+):
+    """
+    root 配下を走査して媒体タイプ番号ごとの並列リストに集計する（ignore に含まれる名前のディレクトリは辿らない）
+
+    progress が None でなければ progress_every 件ごと or progress_interval 秒ごとに
+    progress(処理済み件数, 現在のパス) を呼ぶ。戻り値は (処理済み件数, 最後のパス, 最後に通知した件数)。
+    """
+    cdef list stack = [root]
+    cdef dict ext_cache = {}
+    cdef Py_ssize_t processed = 0
+    cdef Py_ssize_t last_emit_count = 0
+    cdef Py_ssize_t seen = 0
+    cdef Py_ssize_t idx, dot, name_len
+    cdef double last_emit_time = monotonic()
+    cdef object size
+    cdef str name, suffix, ext
+    cdef str entry_path = os.fspath(root)
+
+    while stack:
+        if is_cancelled():
+            break
+
+        current_dir = stack.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    seen += 1
+                    if not (seen & cancel_mask) and is_cancelled():
+                        break
+
+                    name = entry.name
+                    if name[:1] == ".":
+                        continue
+
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if name not in ignore:
+                                stack.append(entry.path)
+                            continue
+
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+
+                        size = entry.stat(follow_symlinks=False).st_size if need_size else 0
+                    except OSError:
+                        continue
+
+                    entry_path = entry.path
+
+                    dot = name.rfind(".")
+                    name_len = len(name)
+                    suffix = name[dot:] if 0 < dot < name_len - 1 else ""
+                    ext = ext_cache.get(suffix)
+                    if ext is None:
+                        ext = sys.intern(suffix.lower())
+                        ext_cache[suffix] = ext
+
+                    idx = ext_to_idx.get(ext, other_idx)
+                    if not counts[idx]:
+                        order.append(idx)
+                    counts[idx] += 1
+                    sizes[idx] += size
+                    exts[idx][ext] += 1
+                    files[idx].append(entry_path)
+
+                    processed += 1
+
+                    if progress is not None and (
+                        processed - last_emit_count >= progress_every
+                        or (not (processed & time_check_mask) and monotonic() - last_emit_time >= progress_interval)
+                    ):
+                        last_emit_count = processed
+                        last_emit_time = monotonic()
+                        progress(processed, entry_path)
+
+        except OSError:
+            continue
+
+    return processed, entry_path, last_emit_count
@@ -5,24 +5,300 @@ File processing logic - Sort/Flatten operations
 """
 
 from pathlib import Path
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Iterator, Iterable, Collection, Tuple, TextIO
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
+from array import array
+import errno
+import os
 import shutil
+import sys
+import time
 from datetime import datetime
 
+try:
+    import orjson  # 任意: JSON / JSONL の読み書きを高速化
+except ImportError:
+    orjson = None
+import json
+
+
+# プログレス通知の間引き（N件ごと or 一定秒数ごと）
+_PROGRESS_EVERY = 64
+_PROGRESS_INTERVAL = 0.25
+
+# 移動処理の並列度とバッチサイズ（I/O待ちはGILを解放するのでスレッドで重ねられる）
+_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_IO_BATCH_SIZE = 256
+
+# 操作ログをストリーム出力する際の flush 間隔（件数）
+_STREAM_FLUSH_EVERY = 4096
+
+
+# 大文字小文字を区別しないファイルシステムが既定の環境では名前を畳み込んで比較
+if sys.platform in ("darwin", "win32"):
+    def _name_key(name: str) -> str:
+        return name.casefold()
+else:
+    def _name_key(name: str) -> str:
+        return name
+
+
+def list_names(directory) -> set:
+    """ディレクトリ内の既存エントリ名を集合で返す（重複判定用のスナップショット）"""
+    try:
+        with os.scandir(directory) as entries:
+            return {_name_key(entry.name) for entry in entries}
+    except FileNotFoundError:
+        return set()
+
+
+def reserve_unique_name(taken: set, filename: str) -> str:
+    """taken と重複しないファイル名を決めて taken に登録する（連番 _01, _02 ... を付与）"""
+    key = _name_key(filename)
+    if key not in taken:
+        taken.add(key)
+        return filename
+
+    stem, suffix = os.path.splitext(filename)
+    counter = 1
+    while True:
+        new_filename = f"{stem}_{counter:02d}{suffix}"
+        key = _name_key(new_filename)
+        if key not in taken:
+            taken.add(key)
+            return new_filename
+        counter += 1
+
+
+def move_file(src, dst) -> None:
+    """
+    ファイルを移動（同一ボリュームは rename 1回、別ボリュームのみ shutil.move にフォールバック）
+    
+    移動先が既にある場合は上書きせず FileExistsError（名前の予約後に別のファイルが置かれた場合）。
+    """
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, "移動先が既に存在します", os.fspath(dst))
+    try:
+        # os.replace と違い、Windows では rename 自体も既存ファイルを上書きしない
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(os.fspath(src), os.fspath(dst))
+
+
+def format_timestamp(ns: int) -> str:
+    """time.time_ns() の値を ISO 8601 文字列に変換（ログ出力時にだけ整形する）"""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=remainder // 1000).isoformat()
+
+
+if orjson is not None:
+    def _dumps_line(obj: Dict) -> str:
+        return orjson.dumps(obj).decode("utf-8") + "\n"
+    
+    def dumps_compact_json(obj) -> str:
+        """1行の JSON 文字列（空白なし、非 ASCII はそのまま）に変換"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    
+    def dumps_json(obj) -> bytes:
+        """JSON（インデント2、UTF-8）のバイト列に変換"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    
+    def loads_json(data: bytes):
+        """JSON のバイト列を読み込み"""
+        return orjson.loads(data)
+else:
+    def _dumps_line(obj: Dict) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+    
+    def dumps_compact_json(obj) -> str:
+        """1行の JSON 文字列（空白なし、非 ASCII はそのまま）に変換"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    
+    def dumps_json(obj) -> bytes:
+        """JSON（インデント2、UTF-8）のバイト列に変換"""
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    
+    def loads_json(data: bytes):
+        """JSON のバイト列を読み込み"""
+        return json.loads(data)
+
+
+class JsonlLogWriter:
+    """
+    操作を1行1レコードの JSON (NDJSON) で逐次書き出す（メモリに溜めない）
+    
+    add / add_error は OperationsLog と同じ呼び出し形式で、出力レコードは
+    get_operations_log と同じ形式（timestamp は ISO 8601 文字列）。
+    """
+    
+    __slots__ = ("stream", "count")
+    
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.count = 0
+    
+    def write(self, operation: Dict):
+        # time_ns の整数は書き出す時にだけ整形（呼び出し側の dict は変更しない）
+        timestamp = operation.get("timestamp")
+        if isinstance(timestamp, int):
+            operation = {**operation, "timestamp": format_timestamp(timestamp)}
+        self.stream.write(_dumps_line(operation))
+        self.count += 1
+        if self.count % _STREAM_FLUSH_EVERY == 0:
+            self.stream.flush()
+    
+    def add(self, operation: str, source: str, target: str, timestamp_ns: int, media_type: Optional[str] = None):
+        entry = {"source": source, "target": target}
+        if media_type is not None:
+            entry["media_type"] = media_type
+        entry["operation"] = operation
+        entry["timestamp"] = format_timestamp(timestamp_ns)
+        self.write(entry)
+    
+    def add_error(self, operation: str, source: str, error: str):
+        self.write({"source": source, "error": error, "operation": operation})
+    
+    def flush(self):
+        self.stream.flush()
+
+
+def _try_move(src, dst) -> Optional[Exception]:
+    """スレッドプール用: 移動を実行し、失敗時は例外を返す"""
+    try:
+        move_file(src, dst)
+    except Exception as e:
+        return e
+    return None
+
+
+class OperationsLog:
+    """
+    操作ログ（列指向で保持し、1件ごとの dict を作らない）
+    
+    反復・インデックス参照では従来と同じ形式の dict を都度生成して返す。
+    """
+    
+    __slots__ = ("sources", "targets", "media_types", "errors", "op_codes", "timestamps_ns")
+    
+    # 操作名 <-> 小さな整数コード（未知の操作名は初出時に登録）
+    _OP_NAMES: List[str] = ["flatten", "sort_by_type", "flatten_error", "sort_error"]
+    _OP_CODES: Dict[str, int] = {name: code for code, name in enumerate(_OP_NAMES)}
+    
+    def __init__(self):
+        self.sources: List[str] = []
+        self.targets: List[Optional[str]] = []
+        self.media_types: List[Optional[str]] = []
+        self.errors: List[Optional[str]] = []
+        self.op_codes = array("B")
+        self.timestamps_ns = array("q")
+    
+    @classmethod
+    def _op_code(cls, operation: str) -> int:
+        code = cls._OP_CODES.get(operation)
+        if code is None:
+            code = cls._OP_CODES[operation] = len(cls._OP_NAMES)
+            cls._OP_NAMES.append(operation)
+        return code
+    
+    def add(self, operation: str, source: str, target: str, timestamp_ns: int, media_type: Optional[str] = None):
+        """成功した操作を追加"""
+        self.sources.append(source)
+        self.targets.append(target)
+        self.media_types.append(media_type)
+        self.errors.append(None)
+        self.op_codes.append(self._op_code(operation))
+        self.timestamps_ns.append(timestamp_ns)
+    
+    def add_error(self, operation: str, source: str, error: str):
+        """失敗した操作を追加"""
+        self.sources.append(source)
+        self.targets.append(None)
+        self.media_types.append(None)
+        self.errors.append(error)
+        self.op_codes.append(self._op_code(operation))
+        self.timestamps_ns.append(0)
+    
+    def append(self, operation: Dict):
+        """従来形式の dict から追加（互換用）"""
+        if "error" in operation:
+            self.add_error(operation["operation"], operation.get("source", ""), operation["error"])
+        else:
+            self.add(
+                operation["operation"],
+                operation["source"],
+                operation["target"],
+                operation.get("timestamp", 0),
+                operation.get("media_type"),
+            )
+    
+    def entry(self, index: int) -> Dict:
+        """index 番目の操作を従来形式の dict で返す"""
+        operation = self._OP_NAMES[self.op_codes[index]]
+        error = self.errors[index]
+        if error is not None:
+            return {"source": self.sources[index], "error": error, "operation": operation}
+        
+        entry = {"source": self.sources[index], "target": self.targets[index]}
+        media_type = self.media_types[index]
+        if media_type is not None:
+            entry["media_type"] = media_type
+        entry["operation"] = operation
+        entry["timestamp"] = self.timestamps_ns[index]
+        return entry
+    
+    def __len__(self) -> int:
+        return len(self.sources)
+    
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("operations log index out of range")
+        return self.entry(index)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self.sources)):
+            yield self.entry(index)
+    
+    def to_list(self) -> List[Dict]:
+        """全件を dict のリストに変換（JSON 保存などに使用）"""
+        return list(self)
+    
+    def clear(self):
+        self.sources.clear()
+        self.targets.clear()
+        self.media_types.clear()
+        self.errors.clear()
+        del self.op_codes[:]
+        del self.timestamps_ns[:]
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """iterable を size 件ずつのリストに区切る"""
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
 
 class FileProcessor:
     """ファイル処理エンジン（Sort/Flatten操作）"""
     
     def __init__(self, dry_run: bool = True):
         self.dry_run = dry_run
-        self.operations_log = []
+        self.operations_log = OperationsLog()
+        self._mkdir_cache: set = set()  # 作成済みディレクトリ（mkdir の重複呼び出しを回避）
+        self._dir_listing_cache: Dict[str, set] = {}  # 出力先ごとの使用済みファイル名
     
     def flatten_directory(
         self, 
         source_dir: Path, 
         target_dir: Path, 
         file_types: List[str] = None,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        log_stream: Optional[TextIO] = None
     ) -> Dict:
         """
         フォルダをフラット化
@@ -31,7 +307,8 @@ class FileProcessor:
             source_dir: ソースディレクトリ
             target_dir: ターゲットディレクトリ
             file_types: 処理対象の拡張子リスト（None=全て）
-            progress_callback: プログレスコールバック
+            progress_callback: プログレスコールバック（処理中は進捗率 -1 で件数のみ通知、完了時 100）
+            log_stream: 指定時は操作を NDJSON で逐次書き出し、stats["operations"] には溜めない
         
         Returns:
             処理結果の統計
@@ -40,53 +317,41 @@ class FileProcessor:
             "processed": 0,
             "skipped": 0,
             "errors": 0,
-            "operations": []
+            "operations": OperationsLog()
         }
         
         if not source_dir.exists():
             return stats
         
-        # ファイル収集
-        files_to_process = []
-        for file_path in source_dir.rglob("*"):
-            if file_path.is_file():
-                if file_types is None or file_path.suffix.lower() in file_types:
-                    files_to_process.append(file_path)
+        self._dir_listing_cache.clear()
+        self._mkdir_cache.clear()  # 前回の実行後に消されたディレクトリも作り直す
         
-        total_files = len(files_to_process)
+        # 拡張子フィルタは集合にして O(1) で判定
+        if file_types is not None:
+            file_types = frozenset(ft.lower() for ft in file_types)
         
-        for i, file_path in enumerate(files_to_process):
-            try:
-                # 重複回避のファイル名生成
-                target_path = self._get_unique_target_path(target_dir, file_path.name)
-                
-                operation = {
-                    "source": str(file_path),
-                    "target": str(target_path),
-                    "operation": "flatten",
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                if not self.dry_run:
-                    target_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.move(str(file_path), str(target_path))
-                
-                stats["processed"] += 1
-                stats["operations"].append(operation)
-                self.operations_log.append(operation)
-                
-                if progress_callback:
-                    progress = int((i + 1) / total_files * 100)
-                    progress_callback(progress, f"処理中: {file_path.name}")
-                    
-            except Exception as e:
-                stats["errors"] += 1
-                error_op = {
-                    "source": str(file_path),
-                    "error": str(e),
-                    "operation": "flatten_error"
-                }
-                stats["operations"].append(error_op)
+        # ファイルは走査しながら逐次処理（総数は事前に数えない）
+        skip_dirs = self._nested_dirs(source_dir, [target_dir])
+        target_dir_str = os.fspath(target_dir)
+        
+        def plan(entry: os.DirEntry):
+            # 重複回避のファイル名生成
+            target_path = self._get_unique_target_path(target_dir_str, entry.name)
+            return target_path, None, entry.name
+        
+        self._run_plan(
+            self._iter_files(source_dir, file_types, skip_dirs),
+            plan,
+            stats,
+            "flatten",
+            "flatten_error",
+            progress_callback,
+            history=self.operations_log,
+            log_stream=log_stream,
+        )
+        
+        if progress_callback:
+            progress_callback(100, f"完了: {stats['processed']}件")
         
         return stats
     
@@ -95,7 +360,8 @@ class FileProcessor:
         source_dir: Path,
         target_base_dir: Path,
         media_mapping: Dict[str, List[str]],
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        log_stream: Optional[TextIO] = None
     ) -> Dict:
         """
         媒体タイプ別にファイルを仕分け
@@ -104,7 +370,8 @@ class FileProcessor:
             source_dir: ソースディレクトリ
             target_base_dir: ベースターゲットディレクトリ
             media_mapping: 媒体マッピング
-            progress_callback: プログレスコールバック
+            progress_callback: プログレスコールバック（処理中は進捗率 -1 で件数のみ通知、完了時 100）
+            log_stream: 指定時は操作を NDJSON で逐次書き出し、stats["operations"] には溜めない
         
         Returns:
             処理結果の統計
@@ -113,93 +380,208 @@ class FileProcessor:
             "processed": 0,
             "skipped": 0,
             "errors": 0,
-            "operations": [],
+            "operations": OperationsLog(),
             "by_type": {}
         }
         
         if not source_dir.exists():
             return stats
         
-        # ファイル収集
-        files_to_process = []
-        for file_path in source_dir.rglob("*"):
-            if file_path.is_file():
-                files_to_process.append(file_path)
+        self._dir_listing_cache.clear()
+        self._mkdir_cache.clear()  # 前回の実行後に消されたディレクトリも作り直す
+        ext_to_type = self._build_ext_lookup(media_mapping)
         
-        total_files = len(files_to_process)
+        # ファイルは走査しながら逐次処理（総数は事前に数えない）
+        if source_dir == target_base_dir:
+            type_dirs = [target_base_dir / media_type for media_type in [*media_mapping, "other"]]
+            skip_dirs = self._nested_dirs(source_dir, type_dirs)
+        else:
+            skip_dirs = self._nested_dirs(source_dir, [target_base_dir])
         
-        for i, file_path in enumerate(files_to_process):
-            try:
-                # 媒体タイプ判定
-                ext = file_path.suffix.lower()
-                media_type = self._detect_media_type(ext, media_mapping)
-                
-                # ターゲットディレクトリ作成
-                type_dir = target_base_dir / media_type
-                target_path = self._get_unique_target_path(type_dir, file_path.name)
-                
-                operation = {
-                    "source": str(file_path),
-                    "target": str(target_path),
-                    "media_type": media_type,
-                    "operation": "sort_by_type",
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                if not self.dry_run:
-                    target_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.move(str(file_path), str(target_path))
+        # 媒体タイプごとの出力先パス文字列（Path の結合は媒体タイプごとに1回だけ）
+        type_dirs: Dict[str, str] = {}
+        
+        def plan(entry: os.DirEntry):
+            # 媒体タイプ判定
+            ext = os.path.splitext(entry.name)[1].lower()
+            media_type = ext_to_type.get(ext, "other")
+            
+            # ターゲットディレクトリ作成
+            type_dir = type_dirs.get(media_type)
+            if type_dir is None:
+                type_dir = type_dirs[media_type] = os.fspath(target_base_dir / media_type)
+            target_path = self._get_unique_target_path(type_dir, entry.name)
+            return target_path, media_type, f"{entry.name} -> {media_type}"
+        
+        self._run_plan(
+            self._iter_files(source_dir, skip_dirs=skip_dirs),
+            plan,
+            stats,
+            "sort_by_type",
+            "sort_error",
+            progress_callback,
+            log_stream=log_stream,
+        )
+        
+        if progress_callback:
+            progress_callback(100, f"完了: {stats['processed']}件")
+        
+        return stats
+    
+    def _run_plan(
+        self,
+        files: Iterable[os.DirEntry],
+        plan: Callable[[os.DirEntry], Tuple[str, Optional[str], str]],
+        stats: Dict,
+        operation: str,
+        error_operation: str,
+        progress_callback: Optional[Callable],
+        history: Optional[OperationsLog] = None,
+        log_stream: Optional[TextIO] = None,
+    ):
+        """
+        各ファイルの移動先を plan で決めて移動し、結果を stats に集計
+        
+        plan は (移動先, 媒体タイプ or None, 進捗表示用ラベル) を返す。
+        媒体タイプがあれば stats["by_type"] に件数を数え、history があれば操作ログにも記録する。
+        log_stream があれば stats["operations"] の代わりにそこへ NDJSON で書き出す。
+        
+        移動先の決定（ファイル名の確保）は呼び出し元スレッドで順番に行い、
+        移動そのものだけをスレッドプールで並列実行する。集計は投入順。
+        """
+        executor = None if self.dry_run else ThreadPoolExecutor(max_workers=_IO_WORKERS)
+        last_emit = time.monotonic()
+        sink = stats["operations"] if log_stream is None else JsonlLogWriter(log_stream)
+        
+        try:
+            for batch in _batched(files, _IO_BATCH_SIZE):
+                planned = []
+                for entry in batch:
+                    try:
+                        planned.append((entry.path, *plan(entry), time.time_ns()))
+                    except Exception as e:
+                        self._record_error(stats, sink, entry.path, e, error_operation)
                 
-                stats["processed"] += 1
-                stats["operations"].append(operation)
-                stats["by_type"].setdefault(media_type, 0)
-                stats["by_type"][media_type] += 1
+                if executor is None:
+                    outcomes = repeat(None)
+                else:
+                    outcomes = executor.map(_try_move, [p[0] for p in planned], [p[1] for p in planned])
                 
-                if progress_callback:
-                    progress = int((i + 1) / total_files * 100)
-                    progress_callback(progress, f"処理中: {file_path.name} -> {media_type}")
+                for (source, target, media_type, label, timestamp_ns), error in zip(planned, outcomes):
+                    if error is not None:
+                        self._record_error(stats, sink, source, error, error_operation)
+                        continue
                     
-            except Exception as e:
-                stats["errors"] += 1
-                error_op = {
-                    "source": str(file_path),
-                    "error": str(e),
-                    "operation": "sort_error"
-                }
-                stats["operations"].append(error_op)
-        
-        return stats
+                    stats["processed"] += 1
+                    sink.add(operation, source, target, timestamp_ns, media_type)
+                    if media_type is not None:
+                        stats["by_type"][media_type] = stats["by_type"].get(media_type, 0) + 1
+                    if history is not None:
+                        history.add(operation, source, target, timestamp_ns, media_type)
+                    
+                    if progress_callback:
+                        processed = stats["processed"]
+                        now = time.monotonic()
+                        if processed % _PROGRESS_EVERY == 0 or now - last_emit >= _PROGRESS_INTERVAL:
+                            last_emit = now
+                            progress_callback(-1, f"処理中 ({processed}件): {label}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if log_stream is not None:
+                sink.flush()
     
-    def _get_unique_target_path(self, target_dir: Path, filename: str) -> Path:
-        """重複しないファイルパスを生成"""
-        target_dir.mkdir(parents=True, exist_ok=True)
+    @staticmethod
+    def _record_error(stats: Dict, sink, source: str, error: Exception, operation: str):
+        stats["errors"] += 1
+        sink.add_error(operation, source, str(error))
+    
+    @staticmethod
+    def _nested_dirs(source_dir: Path, dirs: List[Path]) -> frozenset:
+        """source_dir 配下にある出力先ディレクトリを正規化パスで返す（走査対象から除外する）"""
+        source = os.path.normcase(os.path.abspath(source_dir))
+        nested = set()
+        for d in dirs:
+            key = os.path.normcase(os.path.abspath(d))
+            if key != source and key.startswith(source.rstrip(os.sep) + os.sep):
+                nested.add(key)
+        return frozenset(nested)
+
+    @staticmethod
+    def _iter_files(
+        root: Path,
+        exts: Optional[Collection[str]] = None,
+        skip_dirs: Collection[str] = (),
+    ) -> Iterator[os.DirEntry]:
+        """
+        os.scandir で再帰走査し、ファイルの DirEntry を順次返す（キャッシュで追加 stat を回避し、Path も生成しない）
         
-        base_path = target_dir / filename
-        if not base_path.exists():
-            return base_path
+        各ディレクトリの一覧は先に読み切ってから返すため、呼び出し側が処理中に
+        同じディレクトリへファイルを移動しても走査結果は変わらない。
+        """
+        stack = [root]
+        while stack:
+            current_dir = stack.pop()
+            try:
+                with os.scandir(current_dir) as it:
+                    entries = list(it)
+            except OSError:
+                # ディレクトリアクセスエラーはスキップ
+                continue
+
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not skip_dirs or os.path.normcase(os.path.abspath(entry.path)) not in skip_dirs:
+                            stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+
+                if exts is not None and os.path.splitext(entry.name)[1].lower() not in exts:
+                    continue
+                yield entry
+
+    def _ensure_dir(self, directory: str):
+        """ディレクトリを作成（作成済みならシステムコールを発行しない）"""
+        if directory not in self._mkdir_cache:
+            os.makedirs(directory, exist_ok=True)
+            self._mkdir_cache.add(directory)
+    
+    def _get_unique_target_path(self, target_dir: str, filename: str) -> str:
+        """重複しないファイルパスを生成（既存名は出力先ごとに1回だけ読み込む）"""
+        taken = self._dir_listing_cache.get(target_dir)
+        if taken is None:
+            self._ensure_dir(target_dir)
+            taken = self._dir_listing_cache[target_dir] = list_names(target_dir)
         
         # 重複する場合は連番を付与
-        stem = Path(filename).stem
-        suffix = Path(filename).suffix
-        counter = 1
-        
-        while True:
-            new_filename = f"{stem}_{counter:02d}{suffix}"
-            new_path = target_dir / new_filename
-            if not new_path.exists():
-                return new_path
-            counter += 1
-    
-    def _detect_media_type(self, ext: str, media_mapping: Dict[str, List[str]]) -> str:
-        """拡張子から媒体タイプを判定"""
+        return os.path.join(target_dir, reserve_unique_name(taken, filename))
+    
+    @staticmethod
+    def _build_ext_lookup(media_mapping: Dict[str, List[str]]) -> Dict[str, str]:
+        """媒体マッピングを 拡張子→媒体タイプ の辞書に展開（重複時は先に定義された媒体を優先）"""
+        ext_to_type: Dict[str, str] = {}
         for media_type, extensions in media_mapping.items():
-            if ext in extensions:
-                return media_type
-        return "other"
+            for ext in extensions:
+                ext_to_type.setdefault(ext, media_type)
+        return ext_to_type
     
     def get_operations_log(self) -> List[Dict]:
-        """操作ログを取得"""
-        return self.operations_log.copy()
+        """操作ログを取得（timestamp は ISO 8601 文字列に整形して返す）"""
+        log = []
+        for entry in self.operations_log:  # 反復ごとに新しい dict が返る
+            if isinstance(entry.get("timestamp"), int):
+                entry["timestamp"] = format_timestamp(entry["timestamp"])
+            log.append(entry)
+        return log
+    
+    def save_operations_log(self, file_path: Path):
+        """操作ログを JSON ファイルに保存"""
+        with open(file_path, 'wb') as f:
+            f.write(dumps_json(self.get_operations_log()))
     
     def clear_log(self):
         """ログをクリア"""
@@ -5,15 +5,182 @@ Rule processing logic for advanced file operations
 """
 
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
-from dataclasses import dataclass
-import json
-from datetime import datetime
+import re
+from typing import List, Dict, Any, Optional, Callable, Tuple, TextIO
+from dataclasses import dataclass, field, replace
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from operator import attrgetter
+import bisect
+import errno
+import os
+import shutil
+import time
+import warnings
 
+from .processor import (
+    move_file, list_names, reserve_unique_name, JsonlLogWriter, dumps_json, loads_json,
+    _IO_WORKERS, _IO_BATCH_SIZE,
+)
 
-@dataclass
+
+# 条件判定関数: (ファイルパス, ファイル情報, stat結果 or None) -> マッチするか
+ConditionFn = Callable[[Path, Dict[str, Any], Optional[os.stat_result]], bool]
+
+# 出力先テンプレート関数: (ファイルパス, ファイル情報, stat結果 or None) -> 相対ディレクトリ
+TargetFn = Callable[[Path, Dict[str, Any], Optional[os.stat_result]], str]
+
+_MB = 1024 * 1024
+_PRIORITY_KEY = attrgetter("priority")
+_PLACEHOLDER_RE = re.compile(r"\{(extension|media_type|year|month)\}")
+
+
+def _compile_condition(condition: Dict[str, Any]) -> Tuple[ConditionFn, bool]:
+    """条件辞書を判定関数に変換（存在するキーの判定だけを組み立てる）
+    
+    戻り値は (判定関数, 更新日時の判定に stat が必要か)
+    """
+    checks: List[ConditionFn] = []
+    
+    # 媒体タイプチェック
+    if "media_type" in condition:
+        media_type = condition["media_type"]
+        checks.append(lambda p, info, st: info.get("media_type") == media_type)
+    
+    # 拡張子チェック
+    if "extensions" in condition:
+        extensions = frozenset(condition["extensions"])
+        checks.append(lambda p, info, st: p.suffix.lower() in extensions)
+    
+    # サイズチェック
+    if "min_size_mb" in condition:
+        min_size = condition["min_size_mb"]
+        checks.append(lambda p, info, st: info.get("size", 0) / _MB >= min_size)
+    
+    if "max_size_mb" in condition:
+        max_size = condition["max_size_mb"]
+        checks.append(lambda p, info, st: info.get("size", 0) / _MB <= max_size)
+    
+    # 日付チェック（stat できなかったファイルはマッチしない）
+    needs_stat = "older_than_days" in condition or "newer_than_days" in condition
+    
+    if "older_than_days" in condition:
+        older_than = condition["older_than_days"]
+        checks.append(lambda p, info, st: st is not None and _days_old(st) >= older_than)
+    
+    if "newer_than_days" in condition:
+        newer_than = condition["newer_than_days"]
+        checks.append(lambda p, info, st: st is not None and _days_old(st) <= newer_than)
+    
+    if not checks:
+        return (lambda p, info, st: True), needs_stat
+    if len(checks) == 1:
+        return checks[0], needs_stat
+    
+    def matches(p: Path, info: Dict[str, Any], st: Optional[os.stat_result]) -> bool:
+        for check in checks:
+            if not check(p, info, st):
+                return False
+        return True
+    
+    return matches, needs_stat
+
+
+_DAY_NS = 86400 * 1_000_000_000
+
+
+def _days_old(st: os.stat_result) -> int:
+    """最終更新からの経過日数（datetime を作らず整数演算で計算）"""
+    return (time.time_ns() - st.st_mtime_ns) // _DAY_NS
+
+
+def _mtime_fields(p: Path, st: Optional[os.stat_result]) -> time.struct_time:
+    """更新日時（ローカル時刻）を取得（stat 済みなら再利用）"""
+    return time.localtime((st if st is not None else p.stat()).st_mtime)
+
+
+_PLACEHOLDER_VALUES: Dict[str, TargetFn] = {
+    "extension": lambda p, info, st: p.suffix.lower().lstrip('.'),
+    "media_type": lambda p, info, st: info.get("media_type", "other"),
+    "year": lambda p, info, st: str(_mtime_fields(p, st).tm_year),
+    "month": lambda p, info, st: f"{_mtime_fields(p, st).tm_mon:02d}",
+}
+
+
+def _compile_target(template: str) -> TargetFn:
+    """出力先テンプレートを関数に変換（含まれるプレースホルダーだけを置換）"""
+    parts = _PLACEHOLDER_RE.split(template)
+    if len(parts) == 1:
+        return lambda p, info, st: template
+    
+    # split の結果は [定数, 名前, 定数, 名前, ..., 定数] の順
+    getters = [_PLACEHOLDER_VALUES[name] for name in parts[1::2]]
+    literals = parts[0::2]
+    
+    # {year} と {month} を両方使う場合も stat は1回だけ
+    if "year" in parts[1::2] or "month" in parts[1::2]:
+        def render(p: Path, info: Dict[str, Any], st: Optional[os.stat_result]) -> str:
+            if st is None:
+                st = p.stat()
+            return _join_parts(literals, getters, p, info, st)
+    else:
+        def render(p: Path, info: Dict[str, Any], st: Optional[os.stat_result]) -> str:
+            return _join_parts(literals, getters, p, info, st)
+    
+    return render
+
+
+def _compile_rule_target(action: Dict[str, Any]) -> TargetFn:
+    """action の target_dir をコンパイル（不正な場合はルールを読み込んだまま、適用時にエラーにする）"""
+    try:
+        return _compile_target(action["target_dir"])
+    except (KeyError, TypeError) as e:
+        error = e
+        
+        def render(p: Path, info: Dict[str, Any], st: Optional[os.stat_result]) -> str:
+            raise error
+        return render
+
+
+def _join_parts(literals: List[str], getters: List[TargetFn], p: Path, info: Dict[str, Any], st) -> str:
+    """定数部分とプレースホルダーの値を交互に連結"""
+    out = [literals[0]]
+    for getter, literal in zip(getters, literals[1:]):
+        out.append(getter(p, info, st))
+        out.append(literal)
+    return "".join(out)
+
+
+def _stat_or_none(file_path: Path) -> Optional[os.stat_result]:
+    """stat を1回だけ実行し、失敗時は None"""
+    try:
+        return file_path.stat()
+    except OSError:
+        return None
+
+
+def _link_file(source: Path, target: Path):
+    """ハードリンクを作成（別ボリュームでリンクできない場合はコピーにフォールバック）"""
+    try:
+        os.link(source, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        warnings.warn(f"別ボリュームのためハードリンクできません。コピーします: {source} -> {target}")
+        shutil.copy2(source, target)
+
+
+# 操作名 -> ファイル操作関数
+_OP_DISPATCH: Dict[str, Callable[[Path, Path], Any]] = {
+    "move": move_file,
+    "copy": shutil.copy2,
+    "link": _link_file,
+}
+
+
+@dataclass(frozen=True, slots=True)
 class ProcessingRule:
-    """処理ルール定義"""
+    """処理ルール定義（不変。変更は dataclasses.replace で新しいインスタンスを作る）"""
     id: str
     name: str
     description: str
@@ -21,6 +188,16 @@ class ProcessingRule:
     action: Dict[str, Any]
     enabled: bool = True
     priority: int = 0
+    # condition / action から生成した関数（生成時に1回だけコンパイル）
+    compiled: ConditionFn = field(init=False, repr=False, compare=False)
+    needs_stat: bool = field(init=False, repr=False, compare=False)
+    target_fn: TargetFn = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        compiled, needs_stat = _compile_condition(self.condition)
+        object.__setattr__(self, "compiled", compiled)
+        object.__setattr__(self, "needs_stat", needs_stat)
+        object.__setattr__(self, "target_fn", _compile_rule_target(self.action))
 
 
 class RuleEngine:
@@ -28,6 +205,8 @@ class RuleEngine:
     
     def __init__(self):
         self.rules: List[ProcessingRule] = []
+        self._mkdir_cache: set = set()  # 作成済みディレクトリ（mkdir の重複呼び出しを回避）
+        self._dir_listing_cache: Dict[Path, set] = {}  # 出力先ごとの使用済みファイル名
         self.load_default_rules()
     
     def load_default_rules(self):
@@ -106,8 +285,8 @@ class RuleEngine:
     
     def add_rule(self, rule: ProcessingRule):
         """ルールを追加"""
-        self.rules.append(rule)
-        self.rules.sort(key=lambda r: r.priority)
+        # 優先度順を保ったまま挿入（同じ優先度なら後から追加したものが後ろ）
+        bisect.insort_right(self.rules, rule, key=_PRIORITY_KEY)
     
     def remove_rule(self, rule_id: str) -> bool:
         """ルールを削除"""
@@ -117,6 +296,14 @@ class RuleEngine:
                 return True
         return False
     
+    def set_rule_enabled(self, rule_id: str, enabled: bool) -> bool:
+        """ルールの有効/無効を切り替え（ルールは不変なので置き換える）"""
+        for i, rule in enumerate(self.rules):
+            if rule.id == rule_id:
+                self.rules[i] = replace(rule, enabled=enabled)
+                return True
+        return False
+    
     def get_rule(self, rule_id: str) -> Optional[ProcessingRule]:
         """IDでルールを取得"""
         for rule in self.rules:
@@ -128,67 +315,73 @@ class RuleEngine:
         """有効なルールを取得"""
         return [rule for rule in self.rules if rule.enabled]
     
-    def evaluate_file(self, file_path: Path, file_info: Dict[str, Any]) -> List[ProcessingRule]:
-        """ファイルに適用されるルールを評価"""
-        matching_rules = []
+    def evaluate_file(
+        self,
+        file_path: Path,
+        file_info: Dict[str, Any],
+        st: Optional[os.stat_result] = None,
+        rules: Optional[List[ProcessingRule]] = None
+    ) -> List[ProcessingRule]:
+        """ファイルに適用されるルールを評価（stat は必要な場合のみ1回だけ実行）"""
+        if rules is None:
+            rules = self.get_enabled_rules()
+        if st is None and any(rule.needs_stat for rule in rules):
+            st = _stat_or_none(file_path)
         
-        for rule in self.get_enabled_rules():
-            if self._matches_condition(file_path, file_info, rule.condition):
-                matching_rules.append(rule)
+        return [rule for rule in rules if rule.compiled(file_path, file_info, st)]
+    
+    def evaluate_first(
+        self,
+        file_path: Path,
+        file_info: Dict[str, Any],
+        st: Optional[os.stat_result] = None,
+        rules: Optional[List[ProcessingRule]] = None
+    ) -> Optional[ProcessingRule]:
+        """最初にマッチするルール（優先度順）を返す。マッチしなければ None"""
+        return self._first_match(file_path, file_info, st, rules)[0]
+    
+    def _first_match(
+        self,
+        file_path: Path,
+        file_info: Dict[str, Any],
+        st: Optional[os.stat_result] = None,
+        rules: Optional[List[ProcessingRule]] = None
+    ) -> Tuple[Optional[ProcessingRule], Optional[os.stat_result]]:
+        """最初にマッチしたルールで評価を打ち切る（stat は日付条件のルールに達したときだけ実行）
         
-        return matching_rules
+        戻り値は (ルール or None, 取得済みの stat 結果 or None)
+        """
+        if rules is None:
+            rules = self.get_enabled_rules()
+        stat_done = st is not None
+        
+        for rule in rules:
+            if rule.needs_stat and not stat_done:
+                st = _stat_or_none(file_path)
+                stat_done = True
+            if rule.compiled(file_path, file_info, st):
+                return rule, st
+        return None, st
     
     def _matches_condition(self, file_path: Path, file_info: Dict[str, Any], condition: Dict[str, Any]) -> bool:
         """条件にマッチするかチェック"""
-        # 媒体タイプチェック
-        if "media_type" in condition:
-            if file_info.get("media_type") != condition["media_type"]:
-                return False
-        
-        # 拡張子チェック
-        if "extensions" in condition:
-            if file_path.suffix.lower() not in condition["extensions"]:
-                return False
-        
-        # サイズチェック
-        file_size_mb = file_info.get("size", 0) / (1024 * 1024)
-        if "min_size_mb" in condition:
-            if file_size_mb < condition["min_size_mb"]:
-                return False
-        
-        if "max_size_mb" in condition:
-            if file_size_mb > condition["max_size_mb"]:
-                return False
-        
-        # 日付チェック
-        if "older_than_days" in condition:
-            try:
-                file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                days_old = (datetime.now() - file_mtime).days
-                if days_old < condition["older_than_days"]:
-                    return False
-            except:
-                return False
-        
-        if "newer_than_days" in condition:
-            try:
-                file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                days_old = (datetime.now() - file_mtime).days
-                if days_old > condition["newer_than_days"]:
-                    return False
-            except:
-                return False
-        
-        return True
+        matches, needs_stat = _compile_condition(condition)
+        st = _stat_or_none(file_path) if needs_stat else None
+        return matches(file_path, file_info, st)
     
     def apply_rules(
         self, 
         files_info: List[Dict[str, Any]], 
         base_target_dir: Path,
         dry_run: bool = True,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        log_stream: Optional[TextIO] = None
     ) -> Dict[str, Any]:
-        """ルールを適用してファイル処理を実行"""
+        """
+        ルールを適用してファイル処理を実行
+        
+        log_stream を指定すると操作を NDJSON で逐次書き出し、results["operations"] には溜めない
+        """
         results = {
             "processed": 0,
             "skipped": 0,
@@ -198,104 +391,132 @@ class RuleEngine:
         }
         
         total_files = len(files_info)
+        self._dir_listing_cache.clear()
+        self._mkdir_cache.clear()  # 前回の実行後に消されたディレクトリも作り直す
         
-        for i, file_info in enumerate(files_info):
-            try:
-                file_path = Path(file_info["path"])
-                matching_rules = self.evaluate_file(file_path, file_info)
-                
-                if not matching_rules:
-                    results["skipped"] += 1
-                    continue
-                
-                # 最初にマッチしたルールを適用（優先度順）
-                rule = matching_rules[0]
-                target_path = self._generate_target_path(file_path, rule.action, base_target_dir, file_info)
-                
-                operation = {
-                    "source": str(file_path),
-                    "target": str(target_path),
-                    "rule_id": rule.id,
-                    "rule_name": rule.name,
-                    "operation": rule.action["operation"],
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                if not dry_run:
-                    self._execute_operation(file_path, target_path, rule.action["operation"])
+        # 有効ルールは1回だけ取り出す
+        enabled_rules = self.get_enabled_rules()
+        
+        # 操作の出力先（メモリ上のリスト or NDJSON ストリーム）
+        if log_stream is None:
+            emit = results["operations"].append
+        else:
+            writer = JsonlLogWriter(log_stream)
+            emit = writer.write
+        
+        def record_error(file_info: Dict[str, Any], error: Exception):
+            results["errors"] += 1
+            error_op = {
+                "source": str(file_info.get("path", "unknown")),
+                "error": str(error),
+                "operation": "rule_error"
+            }
+            emit(error_op)
+        
+        # ルール評価と移動先の決定は順番に行い、ファイル操作だけをスレッドプールで並列実行
+        executor = None if dry_run else ThreadPoolExecutor(max_workers=_IO_WORKERS)
+        
+        try:
+            for start in range(0, total_files, _IO_BATCH_SIZE):
+                planned = []
+                for i in range(start, min(start + _IO_BATCH_SIZE, total_files)):
+                    file_info = files_info[i]
+                    try:
+                        file_path = Path(file_info["path"])
+                        # 最初にマッチしたルールを適用（優先度順、以降のルールは評価しない）
+                        rule, st = self._first_match(file_path, file_info, None, enabled_rules)
+                        
+                        if rule is None:
+                            results["skipped"] += 1
+                            continue
+                        
+                        target_path = self._generate_target_path(file_path, rule, base_target_dir, file_info, st)
+                        
+                        operation = {
+                            "source": str(file_path),
+                            "target": str(target_path),
+                            "rule_id": rule.id,
+                            "rule_name": rule.name,
+                            "operation": rule.action["operation"],
+                            "timestamp": time.time_ns()
+                        }
+                        planned.append((i, file_info, rule, operation, file_path, target_path))
+                    except Exception as e:
+                        record_error(file_info, e)
                 
-                results["processed"] += 1
-                results["operations"].append(operation)
-                results["by_rule"].setdefault(rule.id, 0)
-                results["by_rule"][rule.id] += 1
+                if executor is None:
+                    outcomes = repeat(None)
+                else:
+                    outcomes = executor.map(
+                        self._try_execute_operation,
+                        [p[4] for p in planned],
+                        [p[5] for p in planned],
+                        [p[2].action["operation"] for p in planned],
+                    )
                 
-                if progress_callback:
-                    progress = int((i + 1) / total_files * 100)
-                    progress_callback(progress, f"ルール適用中: {rule.name}")
+                for (i, file_info, rule, operation, _source, _target), error in zip(planned, outcomes):
+                    if error is not None:
+                        record_error(file_info, error)
+                        continue
                     
-            except Exception as e:
-                results["errors"] += 1
-                error_op = {
-                    "source": file_info.get("path", "unknown"),
-                    "error": str(e),
-                    "operation": "rule_error"
-                }
-                results["operations"].append(error_op)
+                    results["processed"] += 1
+                    emit(operation)
+                    results["by_rule"].setdefault(rule.id, 0)
+                    results["by_rule"][rule.id] += 1
+                    
+                    if progress_callback:
+                        progress = int((i + 1) / total_files * 100)
+                        progress_callback(progress, f"ルール適用中: {rule.name}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if log_stream is not None:
+                writer.flush()
         
         return results
     
-    def _generate_target_path(self, file_path: Path, action: Dict[str, Any], base_dir: Path, file_info: Dict[str, Any]) -> Path:
-        """ターゲットパスを生成"""
-        target_template = action["target_dir"]
-        
-        # プレースホルダーの置換
-        replacements = {
-            "{extension}": file_path.suffix.lower().lstrip('.'),
-            "{media_type}": file_info.get("media_type", "other"),
-            "{year}": str(datetime.fromtimestamp(file_path.stat().st_mtime).year),
-            "{month}": f"{datetime.fromtimestamp(file_path.stat().st_mtime).month:02d}",
-        }
-        
-        for placeholder, value in replacements.items():
-            target_template = target_template.replace(placeholder, value)
-        
-        target_dir = base_dir / target_template
+    def _generate_target_path(
+        self,
+        file_path: Path,
+        rule: ProcessingRule,
+        base_dir: Path,
+        file_info: Dict[str, Any],
+        st: Optional[os.stat_result] = None
+    ) -> Path:
+        """ターゲットパスを生成（プレースホルダーの置換はルールごとにコンパイル済み）"""
+        target_dir = base_dir / rule.target_fn(file_path, file_info, st)
         return self._get_unique_path(target_dir, file_path.name)
     
+    def _ensure_dir(self, directory: Path):
+        """ディレクトリを作成（作成済みならシステムコールを発行しない）"""
+        if directory not in self._mkdir_cache:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._mkdir_cache.add(directory)
+    
     def _get_unique_path(self, target_dir: Path, filename: str) -> Path:
-        """重複しないパスを生成"""
-        target_dir.mkdir(parents=True, exist_ok=True)
+        """重複しないパスを生成（既存名は出力先ごとに1回だけ読み込む）"""
+        taken = self._dir_listing_cache.get(target_dir)
+        if taken is None:
+            self._ensure_dir(target_dir)
+            taken = self._dir_listing_cache[target_dir] = list_names(target_dir)
         
-        base_path = target_dir / filename
-        if not base_path.exists():
-            return base_path
-        
-        stem = Path(filename).stem
-        suffix = Path(filename).suffix
-        counter = 1
-        
-        while True:
-            new_filename = f"{stem}_{counter:02d}{suffix}"
-            new_path = target_dir / new_filename
-            if not new_path.exists():
-                return new_path
-            counter += 1
+        return target_dir / reserve_unique_name(taken, filename)
+    
+    def _try_execute_operation(self, source: Path, target: Path, operation: str) -> Optional[Exception]:
+        """スレッドプール用: ファイル操作を実行し、失敗時は例外を返す"""
+        try:
+            self._execute_operation(source, target, operation)
+        except Exception as e:
+            return e
+        return None
     
     def _execute_operation(self, source: Path, target: Path, operation: str):
         """実際のファイル操作を実行"""
-        target.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(target.parent)
         
-        if operation == "move":
-            import shutil
-            shutil.move(str(source), str(target))
-        elif operation == "copy":
-            import shutil
-            shutil.copy2(str(source), str(target))
-        elif operation == "link":
-            if hasattr(source, "link_to"):  # Python 3.10+
-                target.hardlink_to(source)
-            else:
-                source.link_to(target)
+        op_fn = _OP_DISPATCH.get(operation)
+        if op_fn is not None:
+            op_fn(source, target)
     
     def save_rules(self, file_path: Path):
         """ルールをJSONファイルに保存"""
@@ -312,20 +533,16 @@ class RuleEngine:
             }
             rules_data.append(rule_dict)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(rules_data, f, indent=2, ensure_ascii=False)
+        with open(file_path, 'wb') as f:
+            f.write(dumps_json(rules_data))
     
     def load_rules(self, file_path: Path):
         """JSONファイルからルールを読み込み"""
         if not file_path.exists():
             return
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            rules_data = json.load(f)
-        
-        self.rules.clear()
-        for rule_dict in rules_data:
-            rule = ProcessingRule(**rule_dict)
-            self.rules.append(rule)
+        with open(file_path, 'rb') as f:
+            rules_data = loads_json(f.read())
         
-        self.rules.sort(key=lambda r: r.priority)
\ No newline at end of file
+        # 読み込み後に1回だけ並べ替え（リストオブジェクト自体は維持）
+        self.rules[:] = sorted((ProcessingRule(**rule_dict) for rule_dict in rules_data), key=_PRIORITY_KEY)
\ No newline at end of file
@@ -5,73 +5,253 @@ File scanning logic - UI independent
 """
 
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from collections import defaultdict
-from threading import Event
+from threading import Event, Lock
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+import glob
 import os
+import sys
+import time
+
+try:
+    import scandir_rs  # 任意: Rust 実装の高速走査（GIL を解放して並列にディレクトリを読む）
+except ImportError:
+    scandir_rs = None
+
+try:
+    from ._scanner_inner import walk_and_tally  # 任意: Cython でビルドした走査・集計ループ（build_dataflux.py で生成）
+except ImportError:
+    walk_and_tally = None
+
+
+# scandir_rs の途中結果を取り出す間隔（秒）
+_NATIVE_POLL_INTERVAL = 0.01
+
+# プログレス通知の間引き（N件ごと or 一定秒数ごと、時刻は 32 件ごとに確認）
+_PROGRESS_EVERY = 500
+_PROGRESS_INTERVAL = 0.1
+_PROGRESS_TIME_CHECK_MASK = 31
+
+# 走査ループ内でキャンセルを確認する間隔（エントリ数、2のべき乗 - 1 のマスク）
+_CANCEL_CHECK_MASK = 1023
+
+
+def _never_cancelled() -> bool:
+    return False
+
+
+# POSIX では bytes パスで走査する（syscall ごとの str -> bytes エンコードを省く）。Windows の API は UTF-16 なので str のまま
+_USE_BYTES_PATHS = os.name != "nt"
+
+
+# ファイル一覧を書き出す際のバッファサイズ（小さな write をまとめる）
+_FILE_LIST_BUFFER_SIZE = 64 * 1024
+
+
+# 媒体マッピング
+_MEDIA_MAPPING = {
+    "video": [".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm", ".mts", ".flv", ".wmv", ".mxf"],
+    "audio": [".wav", ".aiff", ".aif", ".mp3", ".flac", ".m4a", ".aac", ".ogg", ".wma", ".opus"],
+    "image": [".jpg", ".jpeg", ".png", ".gif", ".tif", ".tiff", ".bmp", ".heic", ".webp", ".svg", ".raw", ".dng", ".cr2", ".nef"],
+    "document": [".pdf", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".txt", ".md", ".rtf", ".csv", ".odt"],
+    "3d": [".glb", ".gltf", ".fbx", ".obj", ".stl", ".ply", ".usdz", ".dae", ".3ds", ".blend"],
+}
+
+# 拡張子 -> 媒体タイプ（重複時は先に定義された媒体を優先するため逆順で展開）
+_EXT_TO_MEDIA = {
+    ext: media
+    for media, extensions in reversed(list(_MEDIA_MAPPING.items()))
+    for ext in extensions
+}
+
+# 媒体タイプ番号（走査中の集計用。"other" は末尾）
+_MEDIA_TYPES = (*_MEDIA_MAPPING, "other")
+_OTHER_IDX = len(_MEDIA_TYPES) - 1
+_EXT_TO_MEDIA_IDX = {
+    ext: idx
+    for idx, extensions in reversed(list(enumerate(_MEDIA_MAPPING.values())))
+    for ext in extensions
+}
+
+
+# 既定で中身を走査しないディレクトリ名（ディレクトリ単位で判定し、配下をまるごとスキップする）
+_IGNORE_DIRS = frozenset({"node_modules", "__pycache__", ".git", ".venv", "venv"})
+
+
+def _ignore_set(ignore_dirs: Optional[Iterable[str]]) -> frozenset:
+    """ignore_dirs 引数を frozenset に正規化（None は既定値、空なら何も除外しない）"""
+    return _IGNORE_DIRS if ignore_dirs is None else frozenset(ignore_dirs)
+
+
+def _native_dir_exclude(ignore_dirs: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """ignore_dirs を scandir_rs の dir_exclude（どの深さでも一致する glob パターン）に変換"""
+    return [f"**/{glob.escape(name)}" for name in _ignore_set(ignore_dirs)] or None
+
+
+def _is_hidden(name: str) -> bool:
+    """名前だけで隠しファイル判定（"._" も "." で始まるので1回の比較で足りる）"""
+    return name[:1] == "."
+
+
+@lru_cache(maxsize=256)
+def _detect_media(ext: str) -> str:
+    """拡張子から媒体タイプを判定（拡張子の種類は少ないので結果をキャッシュ）"""
+    return _EXT_TO_MEDIA.get(ext.lower(), "other")
+
+
+# ディレクトリ先読みのスレッド数と、同時に先読みしておくディレクトリ数の上限
+_PREFETCH_WORKERS = 4
+_PREFETCH_MAX_PENDING = 256
+
+
+def _read_dir(dir_path, dot_char, need_size: bool, is_cancelled, ignore: AbstractSet) -> Tuple[list, list]:
+    """
+    1ディレクトリを読み込み (ファイル一覧[(名前, パス, サイズ)], サブディレクトリ一覧) を返す
+    
+    隠しファイルと ignore に含まれる名前のディレクトリは除外し、シンボリックリンクは辿らない。
+    読めないエントリ・ディレクトリはスキップする。
+    """
+    files = []
+    subdirs = []
+    seen = 0
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                seen += 1
+                if not seen & _CANCEL_CHECK_MASK and is_cancelled():
+                    break
+
+                name = entry.name
+                if name[:1] == dot_char:  # 隠しファイル（_is_hidden をインライン化）
+                    continue
+
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in ignore:
+                            subdirs.append(entry.path)
+                        continue
+
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+
+                    # Windows では DirEntry がサイズをキャッシュ済み、POSIX では stat が1回発生する
+                    size = entry.stat(follow_symlinks=False).st_size if need_size else 0
+                except (OSError, PermissionError):
+                    # ファイルアクセスエラーはスキップ
+                    continue
+
+                files.append((name, entry.path, size))
+    except (OSError, PermissionError):
+        # ディレクトリアクセスエラーはスキップ
+        pass
+    return files, subdirs
+
+
+class _MediaTally:
+    """
+    走査中の媒体別集計（媒体タイプ番号で引く並列リストで保持し、1ファイルごとの dict 操作を減らす）
+    
+    to_stats() で従来の {媒体タイプ: {count, size, extensions, files}} 形式に組み立てる。
+    """
+
+    __slots__ = ("counts", "sizes", "exts", "files", "order")
+
+    def __init__(self, n_types: int):
+        self.counts = [0] * n_types
+        self.sizes = [0] * n_types
+        self.exts = [defaultdict(int) for _ in range(n_types)]
+        self.files = [[] for _ in range(n_types)]
+        self.order: List[int] = []  # 初めて出現した順（結果の dict の並び順）
+
+    def merge(self, other: "_MediaTally") -> None:
+        """other の集計をこの集計へ取り込む（媒体タイプ番号ごとに加算するだけで中間の dict は作らない）"""
+        for idx in other.order:
+            if not self.counts[idx]:
+                self.order.append(idx)
+            self.counts[idx] += other.counts[idx]
+            self.sizes[idx] += other.sizes[idx]
+            exts = self.exts[idx]
+            for ext, count in other.exts[idx].items():
+                exts[ext] += count
+            self.files[idx].extend(other.files[idx])
+
+    def to_stats(self, media_types) -> Dict[str, Dict]:
+        return {
+            media_types[idx]: {
+                "count": self.counts[idx],
+                "size": self.sizes[idx],
+                "extensions": self.exts[idx],
+                "files": self.files[idx],
+            }
+            for idx in self.order
+        }
 
 
 class FileScanner:
-    """UIに依存しないファイル走査ロジック"""
+    """
+    UIに依存しないファイル走査ロジック
     
-    # 媒体マッピング
-    MEDIA_MAPPING = {
-        "video": [".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm", ".mts", ".flv", ".wmv", ".mxf"],
-        "audio": [".wav", ".aiff", ".aif", ".mp3", ".flac", ".m4a", ".aac", ".ogg", ".wma", ".opus"],
-        "image": [".jpg", ".jpeg", ".png", ".gif", ".tif", ".tiff", ".bmp", ".heic", ".webp", ".svg", ".raw", ".dng", ".cr2", ".nef"],
-        "document": [".pdf", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".txt", ".md", ".rtf", ".csv", ".odt"],
-        "3d": [".glb", ".gltf", ".fbx", ".obj", ".stl", ".ply", ".usdz", ".dae", ".3ds", ".blend"],
-    }
+    インスタンスごとの状態は持たない（対応表はモジュール共通の読み取り専用）ため、
+    1つのインスタンスを複数スレッドから共有して使える。
+    """
+    
+    # 媒体マッピング・拡張子 -> 媒体タイプ（読み取り専用ビュー）
+    MEDIA_MAPPING = MappingProxyType(_MEDIA_MAPPING)
+    EXT_TO_MEDIA = MappingProxyType(_EXT_TO_MEDIA)
+    
+    # 既定で走査しないディレクトリ名（各メソッドの ignore_dirs で変更できる）
+    IGNORE_DIRS = _IGNORE_DIRS
     
     @staticmethod
     def is_hidden(path: Union[Path, str]) -> bool:
         """隠しファイル判定（.で始まる、._で始まる等）"""
-        name = path if isinstance(path, str) else path.name
-        return name.startswith(".") or name.startswith("._")
+        return _is_hidden(path if isinstance(path, str) else path.name)
+
+    # 拡張子から媒体タイプを判定（モジュール関数をそのまま公開し、呼び出しを1段減らす）
+    detect_media_type = staticmethod(_detect_media)
 
     @staticmethod
-    def count_files(path: Path, cancel_event: Optional[Event] = None) -> int:
-        """ディレクトリ内のファイル数を再帰的にカウント"""
+    def count_files(
+        path: Path,
+        cancel_event: Optional[Event] = None,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> int:
+        """ディレクトリ内のファイル数を再帰的にカウント（ignore_dirs は scan_directory と同じ）"""
         if not path.exists() or not path.is_dir():
             return 0
 
-        total = 0
-        stack = [path]
+        if scandir_rs is not None:
+            return FileScanner._count_files_native(path, cancel_event, ignore_dirs)
+
+        # 走査ロジックは scan_directory と共通（stat は不要なのでサイズは取らない）
+        return sum(1 for _ in FileScanner._iter_entries_python(path, cancel_event, need_size=False, ignore_dirs=ignore_dirs))
 
-        while stack:
+    @staticmethod
+    def _count_files_native(
+        path: Path,
+        cancel_event: Optional[Event] = None,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> int:
+        """count_files の scandir_rs 版（隠しファイル・シンボリックリンクは数えない）"""
+        counter = scandir_rs.Count(os.fspath(path), skip_hidden=True, dir_exclude=_native_dir_exclude(ignore_dirs))
+        counter.start()
+        while not counter.finished:
             if cancel_event and cancel_event.is_set():
+                counter.stop()
                 break
-
-            current_dir = stack.pop()
-            try:
-                with os.scandir(current_dir) as entries:
-                    for entry in entries:
-                        if cancel_event and cancel_event.is_set():
-                            break
-
-                        if FileScanner.is_hidden(entry.name):
-                            continue
-
-                        entry_path = Path(entry.path)
-
-                        try:
-                            if entry.is_dir(follow_symlinks=False):
-                                stack.append(entry_path)
-                            elif entry.is_file(follow_symlinks=False):
-                                total += 1
-                        except (OSError, PermissionError):
-                            continue
-
-            except (OSError, PermissionError):
-                continue
-
-        return total
+            time.sleep(_NATIVE_POLL_INTERVAL)
+        return counter.results().files
     
     @staticmethod
     def scan_directory(
         path: Path,
         progress_callback=None,
         cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
     ) -> Dict[str, Dict]:
         """
         ディレクトリを走査して媒体別統計を返す
@@ -79,94 +259,268 @@ class FileScanner:
         Args:
             path: 走査対象ディレクトリ
             progress_callback: プログレス通知用コールバック（オプション）
+                (処理済み件数, 発見済み件数, 現在のパス) で呼ばれる。事前の件数計測はしないため
+                発見済み件数は走査とともに増えていく（1回の走査で済ませる）
+                500件ごと or 0.1秒ごとに間引いて呼ばれ、最後の件数は必ず通知される
+            need_size: False の場合はサイズを集計しない（POSIX ではファイルごとの stat を省略でき、size は 0 のまま）
+            ignore_dirs: 配下を走査しないディレクトリ名（None は IGNORE_DIRS、空にすると何も除外しない）
         
         Returns:
             Dict[str, Dict]: 媒体別統計情報
         """
-        stats = defaultdict(lambda: {
-            "count": 0, 
-            "size": 0, 
-            "extensions": defaultdict(int),
-            "files": []
-        })
-        
         if not path.exists() or not path.is_dir():
-            return dict(stats)
-        
-        processed = 0
-        total_files = 0
+            return {}
 
-        try:
-            if progress_callback:
-                total_files = FileScanner.count_files(path, cancel_event)
-                progress_callback(processed, total_files, str(path))
-                if cancel_event and cancel_event.is_set():
-                    return dict(stats)
+        tally = _MediaTally(len(_MEDIA_TYPES))
+        FileScanner._scan_into(tally, path, progress_callback, cancel_event, need_size, ignore_dirs)
+        return tally.to_stats(_MEDIA_TYPES)
 
-            stack = [path]
+    @staticmethod
+    def _scan_into(
+        tally: _MediaTally,
+        path: Path,
+        progress_callback=None,
+        cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> None:
+        """scan_directory の本体（結果を tally に直接積み上げる）"""
+        processed = 0
 
-            while stack:
-                if cancel_event and cancel_event.is_set():
-                    break
+        if progress_callback:
+            progress_callback(processed, processed, str(path))
 
-                current_dir = stack.pop()
-                try:
-                    with os.scandir(current_dir) as entries:
-                        for entry in entries:
-                            if cancel_event and cancel_event.is_set():
-                                break
+        # ホットループ用にローカル変数へ束縛
+        counts, sizes, exts, files, order = tally.counts, tally.sizes, tally.exts, tally.files, tally.order
 
-                            if FileScanner.is_hidden(entry.name):
-                                continue
+        if scandir_rs is None and walk_and_tally is not None:
+            # コンパイル済みループで走査と集計をまとめて行う（通知の間引き条件は下の Python 版と同じ）
+            if progress_callback:
+                def progress(count: int, current: str):
+                    progress_callback(count, count, current)
+            else:
+                progress = None
+            is_cancelled = cancel_event.is_set if cancel_event else _never_cancelled
+            processed, entry_path, last_emit_count = walk_and_tally(
+                path, _EXT_TO_MEDIA_IDX, _OTHER_IDX, need_size, _ignore_set(ignore_dirs),
+                counts, sizes, exts, files, order,
+                is_cancelled, progress,
+                _PROGRESS_EVERY, _PROGRESS_INTERVAL, _CANCEL_CHECK_MASK, _PROGRESS_TIME_CHECK_MASK,
+            )
+            # 最後の件数は必ず通知
+            if progress_callback and processed != last_emit_count:
+                progress_callback(processed, processed, entry_path)
+            return
+
+        monotonic = time.monotonic
+        last_emit_count = 0
+        last_emit_time = monotonic()
+        entry_path = str(path)
+
+        for idx, ext, entry_path, size in FileScanner._iter_entries(path, cancel_event, need_size, ignore_dirs):
+            if not counts[idx]:
+                order.append(idx)
+            counts[idx] += 1
+            sizes[idx] += size
+            exts[idx][ext] += 1
+            files[idx].append(entry_path)
+
+            processed += 1
+
+            # 通知は間引く（UI スレッドへのシグナルが溢れないように）
+            if progress_callback and (
+                processed - last_emit_count >= _PROGRESS_EVERY
+                or (not processed & _PROGRESS_TIME_CHECK_MASK and monotonic() - last_emit_time >= _PROGRESS_INTERVAL)
+            ):
+                last_emit_count = processed
+                last_emit_time = monotonic()
+                progress_callback(processed, processed, entry_path)
+
+        # 最後の件数は必ず通知
+        if progress_callback and processed != last_emit_count:
+            progress_callback(processed, processed, entry_path)
 
-                            entry_path = Path(entry.path)
+    @staticmethod
+    def scan_directory_stream(
+        path: Path,
+        cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[str, str, int]]:
+        """
+        ディレクトリを走査して (媒体タイプ, ファイルパス, サイズ) を1件ずつ返す
+        
+        結果をメモリに溜めないため、ファイル一覧を順に1回だけ処理する用途に使う。
+        """
+        if not path.exists() or not path.is_dir():
+            return
 
-                            try:
-                                if entry.is_dir(follow_symlinks=False):
-                                    stack.append(entry_path)
-                                    continue
+        media_types = _MEDIA_TYPES
+        for idx, _ext, entry_path, size in FileScanner._iter_entries(path, cancel_event, need_size, ignore_dirs):
+            yield media_types[idx], entry_path, size
 
-                                if not entry.is_file(follow_symlinks=False):
-                                    continue
+    @staticmethod
+    def scan_directory_to_file(
+        path: Path,
+        output_path: Path,
+        cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        ディレクトリを走査し、ファイル一覧は output_path へ書き出して統計だけを返す
+        
+        一覧は「媒体タイプ<TAB>サイズ<TAB>パス」の1行1ファイル（UTF-8）。
+        戻り値は scan_directory と同じ形式で、files は空リスト。
+        """
+        if not path.exists() or not path.is_dir():
+            return {}
 
-                                ext = entry_path.suffix.lower()
-                                media_type = FileScanner.detect_media_type(ext)
-                                size = entry.stat(follow_symlinks=False).st_size
+        tally = _MediaTally(len(_MEDIA_TYPES))
+        counts, sizes, exts, order = tally.counts, tally.sizes, tally.exts, tally.order
+        media_types = _MEDIA_TYPES
 
-                                stats[media_type]["count"] += 1
-                                stats[media_type]["size"] += size
-                                stats[media_type]["extensions"][ext] += 1
-                                stats[media_type]["files"].append(str(entry_path))
+        with open(output_path, "wb", buffering=_FILE_LIST_BUFFER_SIZE) as out:
+            for idx, ext, entry_path, size in FileScanner._iter_entries(path, cancel_event, need_size, ignore_dirs):
+                if not counts[idx]:
+                    order.append(idx)
+                counts[idx] += 1
+                sizes[idx] += size
+                exts[idx][ext] += 1
+                out.write(f"{media_types[idx]}\t{size}\t{entry_path}\n".encode("utf-8", "surrogateescape"))
 
-                                processed += 1
+        return tally.to_stats(media_types)
 
-                                if progress_callback:
-                                    progress_callback(processed, total_files, str(entry_path))
+    @staticmethod
+    def _iter_entries(
+        path: Path,
+        cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        """走査結果を (媒体タイプ番号, 拡張子, ファイルパス, サイズ) で順次返す（scandir_rs があれば使用）"""
+        if scandir_rs is not None:
+            return FileScanner._iter_entries_native(path, cancel_event, need_size, ignore_dirs)
+        return FileScanner._iter_entries_python(path, cancel_event, need_size, ignore_dirs)
 
-                            except (OSError, PermissionError):
-                                # ファイルアクセスエラーはスキップ
-                                continue
+    @staticmethod
+    def _iter_entries_python(
+        path: Path,
+        cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        """_iter_entries の os.scandir 版（POSIX では bytes パスで走査し、ファイルのパスだけ str に戻す）"""
+        ext_to_idx = _EXT_TO_MEDIA_IDX
+        other_idx = _OTHER_IDX
+        # 拡張子文字列 -> 小文字化・intern 済みの拡張子（同じ拡張子は同一オブジェクトを共有し lower() も1回だけ）
+        ext_cache: Dict[Union[str, bytes], str] = {}
+        ignore = _ignore_set(ignore_dirs)
+        if _USE_BYTES_PATHS:
+            root, dot_char, decode = os.fsencode(path), b".", os.fsdecode
+            ignore = frozenset(map(os.fsencode, ignore))
+        else:
+            root, dot_char, decode = os.fspath(path), ".", str
+        is_cancelled = cancel_event.is_set if cancel_event else _never_cancelled
+        intern = sys.intern  # ホットループ用にローカル変数へ束縛
 
-                except (OSError, PermissionError):
-                    # ディレクトリアクセスエラーはスキップ
-                    continue
+        # ディレクトリの読み込み（scandir + stat）はスレッドで先読みし、複数の読み込みを同時に進める。
+        # 取り出しは従来どおりスタック順なので、結果の並びは逐次走査と同じ
+        executor = ThreadPoolExecutor(max_workers=_PREFETCH_WORKERS)
+        read_dir = _read_dir
+        stack = [root]
+        pending = 0  # stack 上で先読み中（Future）の数
 
-        except (OSError, PermissionError):
-            pass
+        try:
+            while stack:
+                if is_cancelled():
+                    break
 
-        return dict(stats)
+                item = stack.pop()
+                if isinstance(item, Future):
+                    pending -= 1
+                    files, subdirs = item.result()
+                else:
+                    files, subdirs = read_dir(item, dot_char, need_size, is_cancelled, ignore)
+
+                for subdir in subdirs:
+                    if pending < _PREFETCH_MAX_PENDING:
+                        stack.append(executor.submit(read_dir, subdir, dot_char, need_size, is_cancelled, ignore))
+                        pending += 1
+                    else:
+                        stack.append(subdir)
+
+                for name, entry_path, size in files:
+                    # 拡張子（Path.suffix と同じく末尾の "." だけの場合は空）
+                    dot = name.rfind(dot_char)
+                    suffix = name[dot:] if 0 < dot < len(name) - 1 else name[:0]
+                    ext = ext_cache.get(suffix)
+                    if ext is None:
+                        ext = ext_cache[suffix] = intern(decode(suffix).lower())
+                    # Path は生成せず DirEntry のパスを使う（bytes の場合はここで1回だけ str に戻す）
+                    yield ext_to_idx.get(ext, other_idx), ext, decode(entry_path), size
+        finally:
+            # 途中で打ち切られた場合は未着手の先読みを捨てる
+            executor.shutdown(wait=False, cancel_futures=True)
 
     @staticmethod
-    def detect_media_type(ext: str) -> str:
-        """拡張子から媒体タイプを判定"""
-        ext_lower = ext.lower()
-        
-        for media, extensions in FileScanner.MEDIA_MAPPING.items():
-            if ext_lower in extensions:
-                return media
+    def _iter_entries_native(
+        path: Path,
+        cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        """
+        _iter_entries の scandir_rs 版
         
-        return "other"
-    
+        走査はネイティブスレッドで進め、届いた結果から順に返す。
+        判定条件（隠しファイル・除外ディレクトリ、シンボリックリンクは辿らない）は os.scandir 版と同じ。
+        """
+        root = os.fspath(path)
+        ext_to_idx = _EXT_TO_MEDIA_IDX
+        other_idx = _OTHER_IDX
+        # 拡張子文字列 -> 小文字化・intern 済みの拡張子（同じ拡張子は同一オブジェクトを共有し lower() も1回だけ）
+        ext_cache: Dict[str, str] = {}
+
+        scanner = scandir_rs.Scandir(root, skip_hidden=True, dir_exclude=_native_dir_exclude(ignore_dirs))
+        is_cancelled = cancel_event.is_set if cancel_event else _never_cancelled
+        seen = 0
+
+        scanner.start()
+        try:
+            while True:
+                if is_cancelled():
+                    break
+
+                # finished を先に読むことで、その時点までの結果を取りこぼさない
+                finished = scanner.finished
+                entries, _errors = scanner.results(True)
+
+                for entry in entries:
+                    seen += 1
+                    if not seen & _CANCEL_CHECK_MASK and is_cancelled():
+                        break
+                    if not entry.is_file:
+                        continue
+
+                    # entry.path は root からの相対パス
+                    entry_path = os.path.join(root, entry.path)
+                    name = os.path.basename(entry.path)
+                    dot = name.rfind(".")
+                    suffix = name[dot:] if 0 < dot < len(name) - 1 else ""
+                    ext = ext_cache.get(suffix)
+                    if ext is None:
+                        ext = ext_cache[suffix] = sys.intern(suffix.lower())
+                    yield ext_to_idx.get(ext, other_idx), ext, entry_path, entry.st_size if need_size else 0
+
+                if finished:
+                    break
+                if not entries:
+                    time.sleep(_NATIVE_POLL_INTERVAL)
+        finally:
+            if not scanner.finished:
+                scanner.stop()
+
     @staticmethod
     def get_human_size(bytes_size: int) -> str:
         """バイト数を人間が読みやすい形式に変換"""
@@ -184,62 +538,63 @@ class FileScanner:
         paths: List[Path],
         progress_callback=None,
         cancel_event: Optional[Event] = None,
+        need_size: bool = True,
+        ignore_dirs: Optional[Iterable[str]] = None,
     ) -> Dict[str, Dict]:
         """
         複数ディレクトリを走査して統合結果を返す
         
         Args:
             paths: 走査対象ディレクトリリスト
-            progress_callback: プログレス通知用コールバック
+            progress_callback: プログレス通知用コールバック（発見済み件数は走査とともに増える）
+            need_size: False の場合はサイズを集計しない（scan_directory と同じ）
+            ignore_dirs: 配下を走査しないディレクトリ名（scan_directory と同じ）
             
         Returns:
             Dict[str, Dict]: 統合された媒体別統計情報
         """
-        combined_stats = defaultdict(lambda: {
-            "count": 0, 
-            "size": 0, 
-            "extensions": defaultdict(int),
-            "files": []
-        })
-        
-        if progress_callback:
-            dir_counts = []
-            total_files = 0
-            for path in paths:
-                count = FileScanner.count_files(path, cancel_event)
-                dir_counts.append((path, count))
-                total_files += count
-
-                if cancel_event and cancel_event.is_set():
-                    return dict(combined_stats)
-        else:
-            dir_counts = [(path, 0) for path in paths]
-            total_files = 0
+        # 媒体タイプ番号ごとの固定スロットを1つだけ用意し、各ルートの集計をそこへ加算する
+        combined = _MediaTally(len(_MEDIA_TYPES))
+
+        if not paths:
+            return combined.to_stats(_MEDIA_TYPES)
+
+        # ルートごとにスレッドで並列走査（scandir / stat は GIL を解放するので I/O 待ちを重ねられる）
+        workers = min(len(paths), (os.cpu_count() or 1) * 2)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # 各ルートの処理済み件数を合算して通知（コールバックはロック内で1つずつ呼ぶ）
+            lock = Lock()
+            dir_processed = [0] * len(paths)
+            processed_total = 0
+
+            def make_callback(index: int):
+                def wrapped_callback(processed: int, _total: int, current: str):
+                    nonlocal processed_total
+                    with lock:
+                        processed_total += processed - dir_processed[index]
+                        dir_processed[index] = processed
+                        progress_callback(processed_total, processed_total, current)
+                return wrapped_callback
+
+            def scan_root(index: int, path: Path) -> _MediaTally:
+                tally = _MediaTally(len(_MEDIA_TYPES))
+                if path.exists() and path.is_dir():
+                    FileScanner._scan_into(
+                        tally,
+                        path,
+                        make_callback(index) if progress_callback else None,
+                        cancel_event,
+                        need_size,
+                        ignore_dirs,
+                    )
+                return tally
+
+            futures = [executor.submit(scan_root, index, path) for index, path in enumerate(paths)]
+
+            # 統合（結果の順序を安定させるため paths の順に取り込む）
+            for future in futures:
+                combined.merge(future.result())
+
+        return combined.to_stats(_MEDIA_TYPES)
 
-        processed_offset = 0
-
-        for path, dir_total in dir_counts:
-            if cancel_event and cancel_event.is_set():
-                break
-
-            def wrapped_callback(processed: int, _total: int, current: str):
-                if progress_callback:
-                    progress_callback(processed_offset + processed, total_files, current)
-
-            dir_stats = FileScanner.scan_directory(
-                path,
-                wrapped_callback if progress_callback else None,
-                cancel_event,
-            )
-            
-            # 統合
-            for media_type, data in dir_stats.items():
-                combined_stats[media_type]["count"] += data["count"]
-                combined_stats[media_type]["size"] += data["size"]
-                combined_stats[media_type]["files"].extend(data["files"])
-                
-                for ext, count in data["extensions"].items():
-                    combined_stats[media_type]["extensions"][ext] += count
-            processed_offset += dir_total if dir_total else sum(data["count"] for data in dir_stats.values())
-
-        return dict(combined_stats)
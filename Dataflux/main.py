@@ -170,6 +170,10 @@ def test_core_scanner():
 
 
 if __name__ == "__main__":
+    # PyInstaller でバンドルした実行ファイルでもプロセスプール（テンプレート構築）を使えるようにする
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     # コマンドライン引数の処理
     if len(sys.argv) > 1:
         if sys.argv[1] == "--test":
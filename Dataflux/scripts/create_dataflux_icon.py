@@ -8,17 +8,27 @@ from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 import math
 
-def create_gradient_circle(draw, center, radius, start_color, end_color, alpha=255):
-    """グラデーション円を作成"""
-    for r in range(int(radius)):
-        # グラデーション計算
-        t = r / radius
-        color = tuple(int(start_color[i] * (1-t) + end_color[i] * t) for i in range(3))
-        color = color + (int(alpha * (1-t*0.3)),)
-        
-        # 円を描画
-        x, y = center
-        draw.ellipse([x-r, y-r, x+r, y+r], fill=color)
+def create_gradient_circle(img, center, radius, start_color, end_color, alpha=255):
+    """グラデーション円を作成（中心からの距離で色と不透明度を補間し、円の範囲だけ一括で貼り付け）"""
+    radius = int(radius)
+    if radius <= 0:
+        return
+    x, y = center
+    
+    # 円を囲む正方形の範囲で中心からの距離を計算
+    yy, xx = np.ogrid[-radius:radius + 1, -radius:radius + 1]
+    t = np.hypot(xx, yy) / radius
+    inside = t < 1
+    t = np.minimum(t, 1)[..., None]
+    
+    # グラデーション計算
+    rgb = np.asarray(start_color[:3], dtype=np.float64) * (1 - t) + np.asarray(end_color[:3], dtype=np.float64) * t
+    a = alpha * (1 - t * 0.3)
+    patch = np.concatenate([rgb, a], axis=-1).astype(np.uint8)
+    
+    # 円の内側だけを置き換える（ImageDraw と同じくアルファ合成はしない）
+    mask = Image.fromarray((inside * 255).astype(np.uint8), 'L')
+    img.paste(Image.fromarray(patch, 'RGBA'), (x - radius, y - radius), mask)
 
 def create_flowing_line(draw, points, color, width, alpha_gradient=True):
     """流線を描画"""
@@ -39,10 +49,6 @@ def create_flowing_line(draw, points, color, width, alpha_gradient=True):
 
 def create_dataflux_logo(size=512):
     """Dataflux ロゴを作成"""
-    # RGBA画像作成
-    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
     center = (size//2, size//2)
     
     # 配色定義
@@ -51,38 +57,37 @@ def create_dataflux_logo(size=512):
     brown_color = (120, 80, 60)     # 焦茶
     light_blue = (111, 175, 198)    # 薄い千草色
     
-    # 背景の微細なグラデーション
-    for y in range(size):
-        alpha = int(20 * (1 - abs(y - size//2) / (size//2)))
-        color = kachi_color + (alpha,)
-        draw.line([(0, y), (size, y)], fill=color, width=1)
+    # 背景の微細なグラデーション（行ごとのアルファを配列で計算して RGBA 画像を作成）
+    rows = np.arange(size)
+    row_alpha = (20 * (1 - np.abs(rows - size//2) / (size//2))).astype(np.uint8)
+    background = np.empty((size, size, 4), dtype=np.uint8)
+    background[..., :3] = kachi_color
+    background[..., 3] = row_alpha[:, None]
+    img = Image.fromarray(background, 'RGBA')
+    draw = ImageDraw.Draw(img)
     
     # メインの流線群を作成
+    # 流線の基点
+    start_radius = size * 0.15
+    end_radius = size * 0.4
+    
+    # 複数の制御点で滑らかな曲線を作成（角度に依らない項は全流線で共通なので先に配列で計算）
+    t = np.linspace(0, 1, 20)
+    # スパイラル + 波の組み合わせ
+    angle_base = t * math.pi * 2 + np.sin(t * math.pi * 3) * 0.3
+    radius = start_radius + t * (end_radius - start_radius)
+    # ノイズを追加して自然な流線に
+    noise_x = np.sin(t * math.pi * 6) * size * 0.02
+    noise_y = np.cos(t * math.pi * 4) * size * 0.02
+    
     for i in range(8):
         angle_offset = i * math.pi / 4
+        angle = angle_offset + angle_base
         
-        # 流線の基点
-        start_radius = size * 0.15
-        end_radius = size * 0.4
+        x = center[0] + radius * np.cos(angle) + noise_x
+        y = center[1] + radius * np.sin(angle) + noise_y
         
-        start_x = center[0] + start_radius * math.cos(angle_offset)
-        start_y = center[1] + start_radius * math.sin(angle_offset)
-        
-        # 複数の制御点で滑らかな曲線を作成
-        points = []
-        for t in np.linspace(0, 1, 20):
-            # スパイラル + 波の組み合わせ
-            angle = angle_offset + t * math.pi * 2 + math.sin(t * math.pi * 3) * 0.3
-            radius = start_radius + t * (end_radius - start_radius)
-            
-            # ノイズを追加して自然な流線に
-            noise_x = math.sin(t * math.pi * 6) * size * 0.02
-            noise_y = math.cos(t * math.pi * 4) * size * 0.02
-            
-            x = center[0] + radius * math.cos(angle) + noise_x
-            y = center[1] + radius * math.sin(angle) + noise_y
-            
-            points.append((int(x), int(y)))
+        points = list(zip(x.astype(int).tolist(), y.astype(int).tolist()))
         
         # 色を選択（交互に異なる色）
         if i % 3 == 0:
@@ -107,10 +112,10 @@ def create_dataflux_logo(size=512):
         
         # グラデーション円
         if i % 4 == 0:
-            create_gradient_circle(draw, (int(x), int(y)), 8, 
+            create_gradient_circle(img, (int(x), int(y)), 8, 
                                  chigusa_color, light_blue, 200)
         else:
-            create_gradient_circle(draw, (int(x), int(y)), 5, 
+            create_gradient_circle(img, (int(x), int(y)), 5, 
                                  light_blue, chigusa_color, 150)
     
     # 外周の微細な光効果
@@ -188,12 +193,11 @@ def create_icon_version(logo_img, icon_size=256):
     icon = logo_img.resize((icon_size, icon_size), Image.Resampling.LANCZOS)
     
     # アイコン用に少し単純化
-    draw = ImageDraw.Draw(icon)
     center = (icon_size//2, icon_size//2)
     
     # 中央に強調点を追加
     chigusa_color = (58, 143, 183, 255)
-    create_gradient_circle(draw, center, icon_size//6, 
+    create_gradient_circle(icon, center, icon_size//6, 
                          (58, 143, 183), (111, 175, 198), 255)
     
     return icon
@@ -7,25 +7,43 @@ PNG → ICO (Windows) / ICNS (macOS) 変換
 from PIL import Image
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+def load_source_image(source):
+    """元画像を読み込む（Image が渡された場合はそのまま使う。デコードは1回だけ）"""
+    if isinstance(source, Image.Image):
+        return source
+    image = Image.open(source)
+    image.load()
+    return image
+
+def resize_all(original, sizes):
+    """各サイズへのリサイズを並列実行して {サイズ: 画像} を返す（LANCZOS の処理中は GIL が解放される）"""
+    unique_sizes = list(dict.fromkeys(sizes))
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        resized = executor.map(
+            lambda size: original.resize((size, size), Image.Resampling.LANCZOS),
+            unique_sizes,
+        )
+        return dict(zip(unique_sizes, resized))
+
 def create_ico_from_png(png_path, ico_path, sizes=[16, 32, 48, 64, 128, 256]):
-    """PNG から ICO ファイルを作成"""
+    """PNG から ICO ファイルを作成（png_path には読み込み済みの Image も渡せる）"""
     try:
-        original = Image.open(png_path)
+        original = load_source_image(png_path)
         
         # 各サイズのアイコン画像を作成
-        icon_sizes = []
-        for size in sizes:
-            resized = original.resize((size, size), Image.Resampling.LANCZOS)
-            icon_sizes.append(resized)
+        resized = resize_all(original, sizes)
+        icon_sizes = [resized[size] for size in sizes]
         
-        # ICOファイルとして保存
-        icon_sizes[0].save(
+        # ICOファイルとして保存（Pillow は基準画像より大きいサイズを捨てるため最大サイズを基準にする）
+        largest = max(icon_sizes, key=lambda img: img.width)
+        largest.save(
             ico_path,
             format='ICO',
             sizes=[(img.width, img.height) for img in icon_sizes],
-            append_images=icon_sizes[1:]
+            append_images=[img for img in icon_sizes if img is not largest]
         )
         print(f"✅ ICO created: {ico_path}")
         return True
@@ -34,7 +52,7 @@ def create_ico_from_png(png_path, ico_path, sizes=[16, 32, 48, 64, 128, 256]):
         return False
 
 def create_icns_from_png(png_path, icns_path):
-    """PNG から ICNS ファイルを作成 (macOS用)"""
+    """PNG から ICNS ファイルを作成 (macOS用、png_path には読み込み済みの Image も渡せる)"""
     try:
         # macOSのiconutil使用 (macOS専用)
         if os.system("which iconutil > /dev/null") == 0:
@@ -42,25 +60,26 @@ def create_icns_from_png(png_path, icns_path):
             iconset_dir = Path("temp.iconset")
             iconset_dir.mkdir(exist_ok=True)
             
-            original = Image.open(png_path)
+            original = load_source_image(png_path)
             
-            # 各サイズ作成
-            sizes = {
-                16: "icon_16x16.png",
-                32: "icon_16x16@2x.png", 
-                32: "icon_32x32.png",
-                64: "icon_32x32@2x.png",
-                128: "icon_128x128.png",
-                256: "icon_128x128@2x.png",
-                256: "icon_256x256.png", 
-                512: "icon_256x256@2x.png",
-                512: "icon_512x512.png",
-                1024: "icon_512x512@2x.png"
-            }
+            # 各サイズ作成（@2x は同じピクセル数の画像を共有するので (サイズ, ファイル名) のリストで持つ）
+            sizes = [
+                (16, "icon_16x16.png"),
+                (32, "icon_16x16@2x.png"),
+                (32, "icon_32x32.png"),
+                (64, "icon_32x32@2x.png"),
+                (128, "icon_128x128.png"),
+                (256, "icon_128x128@2x.png"),
+                (256, "icon_256x256.png"),
+                (512, "icon_256x256@2x.png"),
+                (512, "icon_512x512.png"),
+                (1024, "icon_512x512@2x.png"),
+            ]
             
-            for size, filename in sizes.items():
-                resized = original.resize((size, size), Image.Resampling.LANCZOS)
-                resized.save(iconset_dir / filename)
+            # 同じサイズのリサイズは1回だけ（並列に作成し、保存は順に行う）
+            resized = resize_all(original, [size for size, _ in sizes])
+            for size, filename in sizes:
+                resized[size].save(iconset_dir / filename)
             
             # iconutil で変換
             result = subprocess.run([
@@ -100,13 +119,16 @@ def main():
     assets_dir = Path("assets/icons")
     assets_dir.mkdir(parents=True, exist_ok=True)
     
+    # 元画像は1回だけデコードして ICO / ICNS で共有
+    source_image = load_source_image(source_png)
+    
     # Windows ICO
     ico_path = assets_dir / "dataflux.ico"
-    create_ico_from_png(source_png, ico_path)
+    create_ico_from_png(source_image, ico_path)
     
     # macOS ICNS
     icns_path = assets_dir / "dataflux.icns"
-    create_icns_from_png(source_png, icns_path)
+    create_icns_from_png(source_image, icns_path)
     
     # PNG コピー (Linux用)
     png_path = assets_dir / "dataflux.png"
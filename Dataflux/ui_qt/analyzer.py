@@ -7,61 +7,152 @@ Enhanced version with Sort/Flatten operations
 
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
-from PySide6.QtGui import *
+from PySide6.QtGui import QBrush, QColor
 from pathlib import Path
 import sys
 import json
 import csv
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple, Union, Callable, AbstractSet
+from collections import Counter, defaultdict
+from functools import lru_cache
+import multiprocessing
+import os
 import shutil
+import stat
 import time
-from threading import Event
-
-from .folder_tools import (
-    FolderNameDeleteDialog,
-    MATCH_EXACT,
-    remove_folders_matching_query,
-)
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from threading import Event, Lock
 
 # Import the scanner from core module
 sys.path.append(str(Path(__file__).parent.parent))
 from core.scanner import FileScanner
-from core.processor import FileProcessor
+from core.processor import FileProcessor, dumps_compact_json, dumps_json, loads_json, move_file
+
+_SHARED_SCANNER = FileScanner()
+# 拡張子 -> 媒体タイプ（core.scanner 側で拡張子ごとに lru_cache 済み。ファイルごとのクラス属性参照を省く）
+_detect_media_type = FileScanner.detect_media_type
+
+# プロジェクトルートと出力先（resolve() の realpath は import 時の1回だけ）
+_MODULE_ROOT = Path(__file__).resolve().parent.parent
+_LOG_DIR = _MODULE_ROOT / "logs"
+_PRESET_DIR = _MODULE_ROOT / "presets" / "template_build"
+
 
-# Safe imports for optional core.processor functions
+@lru_cache(maxsize=None)
+def _get_core_ops() -> Tuple[Optional[Callable], Optional[Callable]]:
+    """
+    Safe imports for optional core.processor functions
+    
+    (perform_sort, perform_flatten) を初回の Sort/Flatten 実行時にだけ取得する（無ければ両方 None）。
+    """
+    try:
+        from core.processor import perform_sort, perform_flatten
+    except Exception:
+        return None, None
+    return perform_sort, perform_flatten
+
+
+# Linux の reflink（FICLONE ioctl）。使えない環境では通常コピーのみ
 try:
-    from core.processor import perform_sort as _core_perform_sort
-    from core.processor import perform_flatten as _core_perform_flatten
-except Exception:
-    _core_perform_sort = None
-    _core_perform_flatten = None
+    import fcntl
+    _FICLONE = 0x40049409 if sys.platform.startswith("linux") else None
+except ImportError:
+    fcntl = None
+    _FICLONE = None
+
+# これ未満のファイルは reflink を試さずに通常コピー
+_REFLINK_MIN_SIZE = 1 << 20
 
 
 # Internal fallback implementations
-def _unique_path(dest_dir: Path, name: str) -> Path:
-    """Generate unique file path to avoid overwriting"""
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    stem = Path(name).stem
-    suffix = Path(name).suffix
-    candidate = dest_dir / name
-    counter = 1
-    while candidate.exists():
-        candidate = dest_dir / f"{stem}_{counter:02d}{suffix}"
+class _PathReservations:
+    """
+    実行前に出力先をまとめて決めるときの予約状態（_unique_path に渡す）
+    
+    同じ実行内で割り当てたパスと、同名ファイルごとに次に試す連番をメモリ上に持ち、
+    同じフォルダへ同名ファイルが集まっても衝突のたびに _01 から存在確認し直さない。
+    まだ存在しないフォルダの中はファイルシステムへの存在確認自体を省く。
+    """
+
+    __slots__ = ("paths", "next_counter", "dir_exists")
+
+    def __init__(self):
+        self.paths: set = set()
+        self.next_counter: Dict[str, int] = {}
+        self.dir_exists: Dict[str, bool] = {}
+
+
+def _unique_path(
+    dest_dir: Path,
+    name: str,
+    reserved: Optional[_PathReservations] = None,
+    create_dir: bool = True,
+) -> Path:
+    """
+    Generate unique file path to avoid overwriting
+    
+    reserved を渡すと、まだ作成していない予約済みパスも避けて結果を reserved に追加する
+    （実行前に出力先をまとめて決める場合に使う）。create_dir=False なら dest_dir は作成しない
+    （呼び出し側でまとめて作成する）。
+    """
+    if create_dir:
+        dest_dir.mkdir(parents=True, exist_ok=True)
+    # 候補の生成・存在確認は文字列のまま行い、Path は最後に1回だけ作る
+    stem, suffix = os.path.splitext(name)
+    dest_dir_str = os.fspath(dest_dir)
+    candidate = os.path.join(dest_dir_str, name)
+    if reserved is None:
+        counter = 1
+        while os.path.lexists(candidate):
+            candidate = os.path.join(dest_dir_str, f"{stem}_{counter:02d}{suffix}")
+            counter += 1
+        return Path(candidate)
+
+    check_fs = reserved.dir_exists.get(dest_dir_str)
+    if check_fs is None:
+        check_fs = reserved.dir_exists[dest_dir_str] = os.path.isdir(dest_dir_str)
+    # 連番 0 は元の名前。前回までに埋まった連番は飛ばして続きから探す
+    key = candidate
+    counter = reserved.next_counter.get(key, 0)
+    if counter:
+        candidate = os.path.join(dest_dir_str, f"{stem}_{counter:02d}{suffix}")
+    while candidate in reserved.paths or (check_fs and os.path.lexists(candidate)):
         counter += 1
-    return candidate
+        candidate = os.path.join(dest_dir_str, f"{stem}_{counter:02d}{suffix}")
+    reserved.next_counter[key] = counter + 1
+    reserved.paths.add(candidate)
+    return Path(candidate)
+
+
+def _try_reflink(src: Path, dst: Path) -> bool:
+    """大きいファイルを FICLONE で reflink コピーする。CoW 非対応・別 FS などで失敗したら False"""
+    if _FICLONE is None:
+        return False
+    try:
+        with open(src, "rb") as fsrc:
+            if os.fstat(fsrc.fileno()).st_size < _REFLINK_MIN_SIZE:
+                return False
+            with open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        return False
 
 
 def _op_copy(src: Path, dst: Path):
-    """Copy file operation"""
-    shutil.copy2(str(src), str(dst))
+    """Copy file operation（reflink → copyfile のカーネル内コピー → メタデータ複製）"""
+    if not _try_reflink(src, dst):
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
 
 
-def _op_move(src: Path, dst: Path):
-    """Move file operation"""
-    shutil.move(str(src), str(dst))
+def _op_copy_data(src: Path, dst: Path):
+    """Copy file contents only（メタデータを保持しないコピー。copystat の stat/chmod/utime を省く）"""
+    if not _try_reflink(src, dst):
+        shutil.copyfile(src, dst)
 
 
 def _op_link(src: Path, dst: Path):
@@ -69,6 +160,586 @@ def _op_link(src: Path, dst: Path):
     dst.symlink_to(src)
 
 
+# フォルダツリーのトップレベル項目に持たせる種別（"dir" / "file"。追加時に判定済み）
+_PATH_KIND_ROLE = Qt.UserRole + 1
+# フォルダ項目の直下の一覧を取得済み（または取得中）か。未取得のフォルダは展開されたときに取得する
+_LISTED_ROLE = Qt.UserRole + 2
+
+# コピー/移動を並列実行するスレッド数の上限（I/O 待ちが主なので CPU 数より多めに取る）
+_FILE_OP_MAX_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+
+def _run_file_operations(
+    operation_func,
+    plan: List[Tuple[Path, Path]],
+    on_progress=None,
+) -> Tuple[int, int]:
+    """
+    (元パス, 出力先パス) の組をスレッドプールでまとめて実行し (成功数, エラー数) を返す
+    
+    出力先は呼び出し側で重複しないよう決めておくこと。on_progress(完了件数) は呼び出し元スレッドで呼ばれる。
+    """
+    success_count = error_count = 0
+    if not plan:
+        return success_count, error_count
+
+    with ThreadPoolExecutor(max_workers=min(_FILE_OP_MAX_WORKERS, len(plan))) as pool:
+        futures = [pool.submit(operation_func, src, dst) for src, dst in plan]
+        for done, future in enumerate(as_completed(futures), 1):
+            if future.exception() is None:
+                success_count += 1
+            else:
+                error_count += 1
+            if on_progress is not None:
+                on_progress(done)
+    return success_count, error_count
+
+
+def _is_hidden_name(name: str) -> bool:
+    """ファイル名だけで隠しファイル判定（FileScanner.is_hidden と同じ基準。Path を介さない）"""
+    return name[:1] == "."
+
+
+def _entry_is_dir(entry: os.DirEntry) -> bool:
+    """DirEntry.is_dir（Path.is_dir と同じくリンク先を辿り、判定できなければ False）"""
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _entry_is_file(entry: os.DirEntry) -> bool:
+    """DirEntry.is_file（Path.is_file と同じくリンク先を辿り、判定できなければ False）"""
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+@contextmanager
+def _suspend_tree_updates(tree):
+    """ツリーへまとめて項目を追加する間、再描画・シグナル・ソートを止める（終了時に元へ戻す）"""
+    sorting_enabled = tree.isSortingEnabled()
+    tree.setUpdatesEnabled(False)
+    tree.blockSignals(True)
+    tree.setSortingEnabled(False)
+    try:
+        yield
+    finally:
+        tree.setSortingEnabled(sorting_enabled)
+        tree.blockSignals(False)
+        tree.setUpdatesEnabled(True)
+
+
+def _list_folder_entries(folder_path: str) -> Optional[List[Tuple[str, str, bool]]]:
+    """フォルダ直下の (名前, パス, フォルダか) を名前順で返す（隠しファイルは除く）。読めなければ None"""
+    try:
+        with os.scandir(folder_path) as it:
+            entries = sorted(it, key=lambda e: os.path.normcase(e.name))
+    except OSError:
+        return None
+    return [(e.name, e.path, _entry_is_dir(e)) for e in entries if not _is_hidden_name(e.name)]
+
+
+def _materialize_stats(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """集計結果をシグナルで渡す形に変換（取り込み元フォルダの文字列化はここで1回だけ行う）"""
+    return {
+        media_type: {
+            "count": data["count"],
+            "size": data["size"],
+            "extensions": dict(data["extensions"]),
+            "files": data["files"],
+            "source_folders": [os.fspath(folder) for folder in data["source_folders"]],
+        }
+        for media_type, data in stats.items()
+    }
+
+
+def _get_bucket(stats: Dict[str, Dict[str, Any]], media_type: str) -> Dict[str, Any]:
+    """媒体タイプの集計枠を取得（無ければその場で作成）"""
+    bucket = stats.get(media_type)
+    if bucket is None:
+        bucket = stats[media_type] = {
+            "count": 0,
+            "size": 0,
+            "extensions": Counter(),
+            "files": [],
+            "source_folders": set(),
+        }
+    return bucket
+
+
+def _build_scan_index(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, List[str]]]:
+    """走査結果から 媒体タイプ -> 拡張子 -> ファイル一覧 の索引を作る（解析結果の選択時に全件を走査しないため）"""
+    index: Dict[str, Dict[str, List[str]]] = {}
+    for media_type, data in (stats or {}).items():
+        by_ext: Dict[str, List[str]] = defaultdict(list)
+        for file_path in data.get("files", []):
+            by_ext[Path(file_path).suffix.lower()].append(str(file_path))
+        index[media_type] = dict(by_ext)
+    return index
+
+
+# テンプレート構築の出力先解決（プロセスプールに渡せるようモジュール関数にしている）
+_SANITIZE_RE = re.compile(r'[<>:"|?*\x00-\x1f]')
+_SEGMENT_BAD_CHARS = frozenset('<>:"|?*\\/' + "".join(map(chr, range(0x20))))
+_TOKEN_RE = re.compile(r"\{([a-zA-Z0-9_]+)\}")
+# 解析結果ツリーの行頭アイコン（拡張子行は先頭にインデントの空白がある）
+_MEDIA_PREFIX_RE = re.compile(r"^\s*(?:🎵|🎥|🖼️|📄|📦|📁)\s*")
+
+
+def _sanitize_segment(text: str, unknown_value: str) -> str:
+    """フォルダ名セグメントを安全化。"""
+    value = (text or "").strip()
+    if not value:
+        return unknown_value
+
+    # 大半のセグメントは置換対象の文字を含まないので、その場合は正規表現・replace を通さない
+    if not _SEGMENT_BAD_CHARS.isdisjoint(value):
+        value = value.replace("\\", "_").replace("/", "_")
+        value = _SANITIZE_RE.sub("_", value)
+    value = value.strip(" .")
+    return value or unknown_value
+
+
+def _normalize_ext_value(value: str) -> str:
+    raw = (value or "").strip().lower()
+    if not raw:
+        return ""
+    return raw if raw.startswith(".") else f".{raw}"
+
+
+def _prepare_roots(roots: List[Path]) -> List[Tuple[str, int, Path]]:
+    """
+    _root_for_file 用に roots を (比較用プレフィックス, 元のプレフィックス長, ルート) に変換し、深い順に並べる。
+    
+    プレフィックスは os.path.normcase 済みで末尾に区切り文字を付けるため、
+    文字列の前方一致だけで relative_to と同じ判定になる（例外を使わない）。
+    """
+    prepared = []
+    for root in sorted(roots, key=lambda p: len(str(p)), reverse=True):
+        root_str = str(root)
+        if not root_str.endswith(os.sep):
+            root_str += os.sep
+        prepared.append((os.path.normcase(root_str), len(root_str), root))
+    return prepared
+
+
+def _root_for_file(file_path: Path, roots: List[Tuple[str, int, Path]]) -> Optional[Tuple[str, int, Path]]:
+    """roots（_prepare_roots の結果）から file_path を含む最も深いフォルダを返す。"""
+    key = os.path.normcase(str(file_path))
+    for prepared in roots:
+        if key.startswith(prepared[0]):
+            return prepared
+    return None
+
+
+# コンテキストのうち計算に手間のかかるキーのまとまり（テンプレート・ルールで使われなければ省く）
+_DATE_TOKENS = frozenset(("year", "month", "day", "hour"))
+_SIZE_TOKENS = frozenset(("size_band", "size_mb", "size_bytes"))
+_REL_TOKENS = frozenset(("top_folder", "parent_1", "parent_2", "parent_3", "rel_dir"))
+# 月・日・時のゼロ埋め文字列（ファイルごとに書式化しない）
+_PAD2 = tuple(f"{i:02d}" for i in range(60))
+# 条件ルールの判定で参照するキー
+_RULE_CONTEXT_KEYS = frozenset(("media_type", "ext_dot", "size_mb", "size_band", "year", "month", "day"))
+
+
+def _template_needed_tokens(default_template: str, rules: List[Dict[str, Any]]) -> frozenset:
+    """既定テンプレート・ルールのテンプレートとルール条件が参照するコンテキストのキー"""
+    needed = set(_TOKEN_RE.findall(default_template))
+    for rule in rules:
+        if not isinstance(rule, dict):
+            continue
+        template = str(rule.get("template", "")).strip()
+        if template:
+            needed.update(_TOKEN_RE.findall(template))
+            needed.update(_RULE_CONTEXT_KEYS)
+    return frozenset(needed)
+
+
+def _build_template_context(
+    file_path: Path,
+    unknown_value: str,
+    roots: List[Tuple[str, int, Path]],
+    st: Optional[os.stat_result] = None,
+    needed: Optional[AbstractSet[str]] = None,
+) -> Dict[str, Any]:
+    """
+    テンプレート置換用のコンテキストを構築。st（取得済みの stat 結果）があれば stat を省く
+    
+    needed（_template_needed_tokens の結果）を渡すと、日時・サイズ・ルート相対のキーは使われる場合だけ計算する。
+    """
+    ext_dot = file_path.suffix.lower()
+    ext = ext_dot.lstrip(".")
+    context: Dict[str, Any] = {
+        "media_type": _detect_media_type(ext_dot),
+        "ext": ext or unknown_value,
+        "ext_dot": ext_dot or unknown_value,
+        "name": file_path.name,
+        "stem": file_path.stem,
+        "parent": file_path.parent.name or unknown_value,
+        "path": str(file_path),
+    }
+    need_date = needed is None or not _DATE_TOKENS.isdisjoint(needed)
+    need_size = needed is None or not _SIZE_TOKENS.isdisjoint(needed)
+    need_rel = needed is None or not _REL_TOKENS.isdisjoint(needed)
+
+    # 更新日時とサイズは stat 1回から取る
+    if st is None and (need_date or need_size):
+        try:
+            st = os.stat(file_path)
+        except Exception:
+            st = None
+
+    if need_date:
+        mtime = datetime.fromtimestamp(st.st_mtime) if st is not None else datetime.now()
+        year = mtime.year
+        context["year"] = str(year) if year >= 1000 else f"{year:04d}"
+        context["month"] = _PAD2[mtime.month]
+        context["day"] = _PAD2[mtime.day]
+        context["hour"] = _PAD2[mtime.hour]
+
+    if need_size:
+        size_bytes = st.st_size if st is not None else 0
+        size_mb = size_bytes / (1024 * 1024) if size_bytes else 0
+        if size_mb < 1:
+            size_band = "tiny"
+        elif size_mb < 10:
+            size_band = "small"
+        elif size_mb < 100:
+            size_band = "medium"
+        elif size_mb < 1024:
+            size_band = "large"
+        else:
+            size_band = "huge"
+        context["size_band"] = size_band
+        context["size_mb"] = round(size_mb, 4)
+        context["size_bytes"] = size_bytes
+
+    if need_rel:
+        rel_dir = ""
+        top_folder = unknown_value
+        parent_1 = parent_2 = parent_3 = unknown_value
+        matched = _root_for_file(file_path, roots)
+        if matched:
+            # ルート以降の文字列を区切り文字で分け、末尾（ファイル名）を除いたものが親フォルダ
+            rel_parts = [p for p in str(file_path)[matched[1]:].split(os.sep)[:-1] if p not in (".", "")]
+            rel_dir = "/".join(rel_parts)
+            if rel_parts:
+                top_folder = rel_parts[0]
+                parent_1 = rel_parts[-1]
+                if len(rel_parts) >= 2:
+                    parent_2 = rel_parts[-2]
+                if len(rel_parts) >= 3:
+                    parent_3 = rel_parts[-3]
+        context["top_folder"] = top_folder
+        context["parent_1"] = parent_1
+        context["parent_2"] = parent_2
+        context["parent_3"] = parent_3
+        context["rel_dir"] = rel_dir or unknown_value
+
+    return context
+
+
+def _compile_rules(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    条件ルールの比較値を前処理し、各ルールに `_compiled` キーとして持たせたコピーを返す
+    
+    テンプレート読込時に1回だけ呼び、ファイルごとの正規化（小文字化・拡張子の正規化・zfill・float 変換など）を省く。
+    `_compiled` は集合・文字列・数値・正規表現だけなのでプロセスプールにもそのまま渡せる。
+    元の rules（プリセット保存用）は変更しない。
+    """
+    compiled_rules: List[Dict[str, Any]] = []
+    for rule in rules:
+        if not isinstance(rule, dict):
+            compiled_rules.append(rule)
+            continue
+        when = rule.get("when", {})
+        if not isinstance(when, dict):
+            when = {}
+
+        compiled: Dict[str, Any] = {}
+        for key in ("media_type", "size_band"):
+            if key in when:
+                expected = when.get(key)
+                values = expected if isinstance(expected, list) else [expected]
+                compiled[key] = frozenset(str(x).lower() for x in values)
+        if "ext" in when:
+            expected_ext = when.get("ext")
+            values = expected_ext if isinstance(expected_ext, list) else [expected_ext]
+            compiled["ext"] = frozenset(_normalize_ext_value(str(x)) for x in values)
+        for key in ("min_size_mb", "max_size_mb"):
+            if key in when:
+                try:
+                    compiled[key] = float(when.get(key))
+                except Exception:
+                    compiled["never"] = True  # 数値にできない条件は常に不一致（_rule_matches と同じ）
+        if "year" in when:
+            compiled["year"] = str(when.get("year"))
+        for key in ("month", "day"):
+            if key in when:
+                compiled[key] = str(when.get(key)).zfill(2)
+        for key in ("path_contains", "name_contains"):
+            if key in when:
+                compiled[key] = re.compile(re.escape(str(when.get(key))))
+
+        compiled_rule = dict(rule)
+        compiled_rule["_compiled"] = compiled
+        compiled_rules.append(compiled_rule)
+    return compiled_rules
+
+
+def _rule_facts(context: Dict[str, Any], file_path: Path) -> Dict[str, Any]:
+    """ルール判定に使うファイル側の値を正規化（1ファイルにつき1回）"""
+    return {
+        "media_type": str(context.get("media_type", "")).lower(),
+        "ext": _normalize_ext_value(str(context.get("ext_dot", ""))),
+        "size_mb": float(context.get("size_mb", 0) or 0),
+        "size_band": str(context.get("size_band", "")).lower(),
+        "year": str(context.get("year", "")),
+        "month": str(context.get("month", "")),
+        "day": str(context.get("day", "")),
+        "path": str(file_path),
+        "name": file_path.name,
+    }
+
+
+def _compiled_rule_matches(compiled: Dict[str, Any], facts: Dict[str, Any]) -> bool:
+    """_compile_rules 済みの条件を判定（集合の所属と値の比較だけで短絡評価）"""
+    if not compiled:
+        return True
+    if "never" in compiled:
+        return False
+    for key in ("media_type", "ext", "size_band"):
+        expected = compiled.get(key)
+        if expected is not None and facts[key] not in expected:
+            return False
+    if "min_size_mb" in compiled and facts["size_mb"] < compiled["min_size_mb"]:
+        return False
+    if "max_size_mb" in compiled and facts["size_mb"] > compiled["max_size_mb"]:
+        return False
+    for key in ("year", "month", "day"):
+        expected = compiled.get(key)
+        if expected is not None and facts[key] != expected:
+            return False
+    pattern = compiled.get("path_contains")
+    if pattern is not None and not pattern.search(facts["path"]):
+        return False
+    pattern = compiled.get("name_contains")
+    if pattern is not None and not pattern.search(facts["name"]):
+        return False
+    return True
+
+
+def _rule_matches(when: Dict[str, Any], context: Dict[str, Any], file_path: Path) -> bool:
+    """Evaluate one conditional rule."""
+    if not when:
+        return True
+
+    media_type = str(context.get("media_type", "")).lower()
+    ext_dot = _normalize_ext_value(str(context.get("ext_dot", "")))
+    size_mb = float(context.get("size_mb", 0) or 0)
+    size_band = str(context.get("size_band", "")).lower()
+    year = str(context.get("year", ""))
+    month = str(context.get("month", ""))
+    day = str(context.get("day", ""))
+    path_str = str(file_path)
+    name_str = file_path.name
+
+    if "media_type" in when:
+        expected = when.get("media_type")
+        if isinstance(expected, list):
+            if media_type not in [str(x).lower() for x in expected]:
+                return False
+        elif media_type != str(expected).lower():
+            return False
+
+    if "ext" in when:
+        expected_ext = when.get("ext")
+        if isinstance(expected_ext, list):
+            normalized = [_normalize_ext_value(str(x)) for x in expected_ext]
+            if ext_dot not in normalized:
+                return False
+        else:
+            if ext_dot != _normalize_ext_value(str(expected_ext)):
+                return False
+
+    if "min_size_mb" in when:
+        try:
+            if size_mb < float(when.get("min_size_mb")):
+                return False
+        except Exception:
+            return False
+
+    if "max_size_mb" in when:
+        try:
+            if size_mb > float(when.get("max_size_mb")):
+                return False
+        except Exception:
+            return False
+
+    if "size_band" in when:
+        expected_band = when.get("size_band")
+        if isinstance(expected_band, list):
+            if size_band not in [str(x).lower() for x in expected_band]:
+                return False
+        elif size_band != str(expected_band).lower():
+            return False
+
+    if "year" in when and year != str(when.get("year")):
+        return False
+    if "month" in when and month != str(when.get("month")).zfill(2):
+        return False
+    if "day" in when and day != str(when.get("day")).zfill(2):
+        return False
+
+    if "path_contains" in when and str(when.get("path_contains")) not in path_str:
+        return False
+    if "name_contains" in when and str(when.get("name_contains")) not in name_str:
+        return False
+
+    return True
+
+
+def _select_template_by_rules(
+    default_template: str,
+    rules: List[Dict[str, Any]],
+    context: Dict[str, Any],
+    file_path: Path,
+) -> Dict[str, str]:
+    """Select template using first matching rule（_compile_rules 済みのルールは前処理した値で判定）"""
+    facts = None
+    for idx, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            continue
+        when = rule.get("when", {})
+        template = str(rule.get("template", "")).strip()
+        if not template:
+            continue
+        compiled = rule.get("_compiled")
+        if compiled is not None:
+            if facts is None:
+                facts = _rule_facts(context, file_path)
+            matched = _compiled_rule_matches(compiled, facts)
+        else:
+            matched = _rule_matches(when if isinstance(when, dict) else {}, context, file_path)
+        if matched:
+            rule_name = str(rule.get("name", f"rule_{idx+1}")).strip() or f"rule_{idx+1}"
+            return {"template": template, "rule": rule_name}
+    return {"template": default_template, "rule": "default"}
+
+
+@lru_cache(maxsize=256)
+def _compile_template(template: str) -> Tuple[Tuple[Tuple[bool, str], ...], ...]:
+    """
+    テンプレートを "/" 区切りのセグメントごとに (プレースホルダか, トークン名 or リテラル) の並びへ分解
+    
+    テンプレート文字列ごとに1回だけ解析し、ルールごとのテンプレートも全ファイルで共有する。
+    """
+    segments: List[List[Tuple[bool, str]]] = [[]]
+    for i, piece in enumerate(_TOKEN_RE.split(template)):
+        if i % 2:
+            segments[-1].append((True, piece))
+            continue
+        for j, literal in enumerate(piece.replace("\\", "/").split("/")):
+            if j:
+                segments.append([])
+            if literal:
+                segments[-1].append((False, literal))
+    return tuple(tuple(segment) for segment in segments)
+
+
+def _render_template_folder(template: str, context: Dict[str, str], unknown_value: str) -> Path:
+    """テンプレートを展開して相対フォルダパスを返す。"""
+    safe_parts = []
+    for segment in _compile_template(template):
+        text = "".join(
+            _sanitize_segment(str(context.get(name, unknown_value)), unknown_value) if is_token else name
+            for is_token, name in segment
+        )
+        # 置換値は "/" を含まないよう安全化済みだが、unknown_value はそのまま入るため分割し直す
+        parts = text.replace("\\", "/").split("/") if ("/" in text or "\\" in text) else (text,)
+        for p in parts:
+            if p and p not in (".", ".."):
+                safe_parts.append(_sanitize_segment(p, unknown_value))
+    if not safe_parts:
+        safe_parts = [unknown_value]
+    return Path(*safe_parts)
+
+
+def _resolve_template(
+    file_path_str: str,
+    default_template: str,
+    rules: List[Dict[str, Any]],
+    unknown_value: str,
+    roots: List[Tuple[str, int, Path]],
+    needed: Optional[AbstractSet[str]] = None,
+) -> Optional[tuple]:
+    """1ファイルの出力先を (相対フォルダ, 適用テンプレート, ルール名) で返す。対象外・失敗時は None。"""
+    # 存在・種別の確認とコンテキスト用の stat を1回で済ませる（pathlib を介さず文字列のまま os.stat）
+    try:
+        st = os.stat(file_path_str)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    source_path = Path(file_path_str)
+    try:
+        context = _build_template_context(source_path, unknown_value, roots, st, needed)
+        selected = _select_template_by_rules(default_template, rules, context, source_path)
+        rel_folder = _render_template_folder(selected["template"], context, unknown_value)
+        return rel_folder, selected["template"], selected["rule"]
+    except Exception:
+        return None
+
+
+def _resolve_chunk(args: tuple) -> List[Optional[tuple]]:
+    """_resolve_template をまとめて実行（プロセスプールのワーカーで呼ばれる）"""
+    files, default_template, rules, unknown_value, roots, needed = args
+    return [_resolve_template(f, default_template, rules, unknown_value, roots, needed) for f in files]
+
+
+def _resolve_templates_parallel(
+    files: List[str],
+    default_template: str,
+    rules: List[Dict[str, Any]],
+    unknown_value: str,
+    roots: List[Tuple[str, int, Path]],
+    needed: Optional[AbstractSet[str]] = None,
+) -> Optional[List[Optional[tuple]]]:
+    """
+    テンプレート解決をプロセスプールで並列実行（文字列処理は GIL で直列化されるためスレッドではなくプロセス）
+    
+    プールを起動できない環境では None を返し、呼び出し側で逐次処理する。
+    """
+    workers = os.cpu_count() or 1
+    chunk_size = -(-len(files) // workers)
+    chunks = [
+        (files[i:i + chunk_size], default_template, rules, unknown_value, roots, needed)
+        for i in range(0, len(files), chunk_size)
+    ]
+    try:
+        # fork だと Qt のスレッド状態ごと複製されるため、どの OS でも spawn で起動
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            resolved: List[Optional[tuple]] = []
+            for part in pool.map(_resolve_chunk, chunks, chunksize=1):
+                resolved.extend(part)
+            return resolved
+    except Exception:
+        return None
+
+
+# 走査中の進捗通知の間引き（N件ごと or 約30回/秒）
+_PROGRESS_EMIT_EVERY = 256
+_PROGRESS_EMIT_INTERVAL = 0.033
+
+# ログ書き出し時のバッファサイズ
+_LOG_WRITE_BUFFER_SIZE = 1 << 20
+
+# テンプレート構築でプロセスプールを使うファイル数の下限（少数ならプール起動の方が高くつく）
+_TEMPLATE_PROCESS_POOL_THRESHOLD = 50_000
+
+
 class ScannerThread(QThread):
     """複数フォルダ対応の非同期走査スレッド"""
     
@@ -81,52 +752,127 @@ class ScannerThread(QThread):
     error_occurred = Signal(str)             # エラーメッセージ
     log_ready = Signal(str)                  # ログファイルパス
     
-    def __init__(self, paths: List[Path]):
+    def __init__(self, paths: List[Path], progress_target: Optional[QObject] = None):
         super().__init__()
         self.paths = paths if isinstance(paths, list) else [paths]
-        self.scanner = FileScanner()
+        # 指定時は progress_updated を emit せず、progress_target._on_progress(int, int, str) を直接キューに積む
+        self._progress_target = progress_target
+        self.scanner = _SHARED_SCANNER  # 状態を持たないので全スレッド・全ルートで共有
         self.cancel_event = Event()
-        self._log_entries: List[str] = []
+        self._log_entries: List[Tuple[float, str]] = []  # (time.time(), メッセージ)。整形は _finalize_log でまとめて行う
         self._processed_files: int = 0
         self._total_files: int = 0
-
-    def _accumulate_single_file(self, stats: Dict[str, Dict[str, Any]], file_path: Path):
-        """単一ファイルを集計に追加"""
-        if FileScanner.is_hidden(file_path):
+        self._last_emit: int = 0           # 最後に進捗を通知した件数
+        self._last_emit_t: float = 0.0     # 最後に通知した時刻（time.monotonic）
+        # 単一ファイル指定分の保留リスト（並列リストで持ち、ルートの区切りでまとめて集計する）
+        self._pending_files: List[Union[str, Path]] = []
+        self._pending_exts: List[str] = []
+        self._pending_sizes: List[int] = []
+
+    def _emit_progress(self, processed: int, total: int, current: str):
+        """走査進捗を通知（progress_target があればシグナルを経由せず QueuedConnection で直接呼ぶ）"""
+        target = self._progress_target
+        if target is None:
+            self.progress_updated.emit(processed, total, current)
             return
-        try:
-            if not file_path.is_file():
+        QMetaObject.invokeMethod(
+            target,
+            "_on_progress",
+            Qt.QueuedConnection,
+            Q_ARG(int, processed),
+            Q_ARG(int, total),
+            Q_ARG(str, current),
+        )
+
+    def _accumulate_single_file(self, entry_or_path: Union[os.DirEntry, Path]):
+        """
+        単一ファイルを保留リストに追加（集計への反映は _flush_pending でまとめて行う）
+        
+        DirEntry なら走査時にキャッシュされた情報を使い、Path なら stat 1回で種別とサイズを得る。
+        """
+        if isinstance(entry_or_path, os.DirEntry):
+            name = entry_or_path.name
+            # stat より前に、scandir が返した名前だけで隠しファイルを除外
+            if _is_hidden_name(name):
+                return
+            try:
+                if not entry_or_path.is_file(follow_symlinks=False):
+                    return
+                size = entry_or_path.stat(follow_symlinks=False).st_size
+            except OSError:
                 return
+            file_path = entry_or_path.path
+            # 拡張子（Path.suffix と同じく末尾の "." だけの場合は空）
+            dot = name.rfind(".")
+            ext = name[dot:].lower() if 0 < dot < len(name) - 1 else ""
+        else:
+            file_path = entry_or_path
+            if _is_hidden_name(file_path.name):
+                return
+            try:
+                st = file_path.stat()
+            except Exception:
+                return
+            if not stat.S_ISREG(st.st_mode):
+                return
+            size = st.st_size
             ext = file_path.suffix.lower()
-            media_type = FileScanner.detect_media_type(ext)
-            size = file_path.stat().st_size
-            stats[media_type]["count"] += 1
-            stats[media_type]["size"] += size
-            stats[media_type]["extensions"][ext] += 1
-            stats[media_type]["files"].append(str(file_path))
-        except Exception:
+        self._pending_files.append(file_path)  # 文字列化は集計への反映時（_flush_pending）まで遅らせる
+        self._pending_exts.append(ext)
+        self._pending_sizes.append(size)
+
+    def _flush_pending(self, stats: Dict[str, Dict[str, Any]]):
+        """保留中の単一ファイルを集計に反映（拡張子ごとにまとめて加算）"""
+        if not self._pending_files:
             return
+        ext_counts = Counter(self._pending_exts)
+        media_of = {ext: FileScanner.detect_media_type(ext) for ext in ext_counts}
+        for ext, count in ext_counts.items():
+            bucket = _get_bucket(stats, media_of[ext])
+            bucket["count"] += count
+            bucket["extensions"][ext] += count
+        for file_path, ext, size in zip(self._pending_files, self._pending_exts, self._pending_sizes):
+            bucket = stats[media_of[ext]]
+            bucket["size"] += size
+            bucket["files"].append(os.fspath(file_path))
+        self._pending_files.clear()
+        self._pending_exts.clear()
+        self._pending_sizes.clear()
 
     def request_cancel(self):
         """ユーザーからのキャンセル要求"""
         self.cancel_event.set()
 
     def _append_log(self, message: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self._log_entries.append(f"[{timestamp}] {message}")
-
-    def _finalize_log(self, status: str, elapsed: float) -> Optional[Path]:
+        self._log_entries.append((time.time(), message))
+
+    def _iter_log_lines(self, summary: str):
+        """ログの各行を生成（時刻の整形は同じ秒なら使い回す）"""
+        last_second = None
+        stamp = ""
+        for timestamp, message in self._log_entries:
+            second = int(timestamp)
+            if second != last_second:
+                last_second = second
+                stamp = datetime.fromtimestamp(second).strftime("%H:%M:%S")
+            yield f"[{stamp}] {message}"
+        yield summary
+
+    def _finalize_log(self, status: str, elapsed: float, durable: bool = False) -> Optional[Path]:
+        """ログをファイルへ書き出す（1行ずつバッファ経由で書き、全体を1つの文字列にはしない）。durable=True なら fsync まで行う"""
         try:
-            project_root = Path(__file__).resolve().parent.parent
-            log_dir = project_root / "logs"
+            log_dir = _LOG_DIR
             log_dir.mkdir(exist_ok=True)
             summary = (
                 f"status={status} total_files={self._total_files} "
                 f"processed={self._processed_files} elapsed={elapsed:.2f}s"
             )
-            self._log_entries.append(summary)
             log_path = log_dir / f"analyzer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-            log_path.write_text("\n".join(self._log_entries), encoding="utf-8")
+            with open(log_path, "w", encoding="utf-8", buffering=_LOG_WRITE_BUFFER_SIZE) as f:
+                f.writelines(line + "\n" for line in self._iter_log_lines(summary))
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
             return log_path
         except Exception:
             return None
@@ -135,24 +881,34 @@ class ScannerThread(QThread):
         """複数フォルダを順次走査してマージ"""
         start_time = time.monotonic()
         self._log_entries = []
+        self._pending_files.clear()
+        self._pending_exts.clear()
+        self._pending_sizes.clear()
         self._append_log(f"scan start (targets={len(self.paths)})")
 
         try:
-            dir_counts = []
-            total_files = 0
             total_dirs = max(len(self.paths), 1)
-            for index, path in enumerate(self.paths, start=1):
-                if self.cancel_event.is_set():
-                    break
-                self.counting_progress.emit(index - 1, total_dirs, str(path))
+
+            def count_path(path: Path) -> int:
                 if path.exists() and path.is_file():
-                    count = 1 if not FileScanner.is_hidden(path) else 0
-                else:
-                    count = FileScanner.count_files(path, self.cancel_event)
-                dir_counts.append((path, count))
-                total_files += count
-                self._append_log(f"counted {count} files in {path}")
-                self.counting_progress.emit(index, total_dirs, str(path))
+                    return 1 if not FileScanner.is_hidden(path) else 0
+                return FileScanner.count_files(path, self.cancel_event)
+
+            # ルートごとの件数計測も並列に行う（通知とログは完了順にこのスレッドから出す）
+            counts: Dict[int, int] = {}
+            if self.paths:
+                self.counting_progress.emit(0, total_dirs, str(self.paths[0]))
+                with ThreadPoolExecutor(max_workers=min(8, len(self.paths))) as executor:
+                    futures = {executor.submit(count_path, path): index for index, path in enumerate(self.paths)}
+                    for future in as_completed(futures):
+                        index = futures[future]
+                        path = self.paths[index]
+                        counts[index] = future.result()
+                        self._append_log(f"counted {counts[index]} files in {path}")
+                        self.counting_progress.emit(len(counts), total_dirs, str(path))
+
+            dir_counts = [(path, counts[index]) for index, path in enumerate(self.paths)]
+            total_files = sum(count for _path, count in dir_counts)
 
             self._total_files = total_files
 
@@ -166,83 +922,97 @@ class ScannerThread(QThread):
 
             self.scan_started.emit(total_files)
 
-            combined_stats = defaultdict(lambda: {
-                "count": 0,
-                "size": 0,
-                "extensions": defaultdict(int),
-                "files": [],
-                "source_folders": set(),
-            })
+            combined_stats: Dict[str, Dict[str, Any]] = {}
 
-            processed_offset = 0
+            # ルートごとにスレッドで並列走査（I/O 待ちを重ね、所要時間を最も遅いルート程度に抑える）
+            lock = Lock()
+            root_processed = [0] * len(dir_counts)
             processed_global = 0
+            self._last_emit = 0
+            self._last_emit_t = 0.0
 
-            for path, dir_total in dir_counts:
-                if self.cancel_event.is_set():
-                    break
-
-                if path.exists() and path.is_file():
-                    self._accumulate_single_file(combined_stats, path)
-                    processed_offset += dir_total
-                    self._processed_files = processed_offset
-                    self.progress_updated.emit(processed_offset, total_files, str(path))
-                    self._append_log(f"processed {processed_offset} / {total_files} files")
-                    continue
-
-                def wrapped_callback(processed: int, _total: int, current: str):
-                    nonlocal processed_global
-                    processed_global = processed_offset + processed
+            def report(index: int, processed: int, current: str, force: bool = False):
+                """
+                ルート index の処理済み件数を更新して全体の件数を通知（ワーカースレッドからも呼ばれる）
+                
+                シグナルはスレッドをまたいで UI のイベントループを起こすため、
+                _PROGRESS_EMIT_EVERY 件ごと or _PROGRESS_EMIT_INTERVAL 秒ごとに間引く（force=True は必ず通知）
+                """
+                nonlocal processed_global
+                with lock:
+                    processed_global += processed - root_processed[index]
+                    root_processed[index] = processed
                     self._processed_files = processed_global
-                    self.progress_updated.emit(processed_global, total_files, current)
-
-                stats = self.scanner.scan_directory(
-                    path,
-                    wrapped_callback,
-                    self.cancel_event,
-                )
-
-                for media_type, data in stats.items():
-                    bucket = combined_stats[media_type]
-                    bucket["count"] += data["count"]
-                    bucket["size"] += data["size"]
-                    bucket["files"].extend(data["files"])
-                    bucket["source_folders"].add(str(path))
-
-                    for ext, count in data["extensions"].items():
-                        bucket["extensions"][ext] += count
-
-                processed_offset += dir_total if dir_total else sum(d["count"] for d in stats.values())
-                self._append_log(f"processed {processed_offset} / {total_files} files")
+                    now = time.monotonic()
+                    if (
+                        force
+                        or processed_global - self._last_emit >= _PROGRESS_EMIT_EVERY
+                        or now - self._last_emit_t >= _PROGRESS_EMIT_INTERVAL
+                    ):
+                        self._last_emit = processed_global
+                        self._last_emit_t = now
+                        self._emit_progress(processed_global, total_files, current)
+
+            def make_callback(index: int):
+                def wrapped_callback(processed: int, _total: int, current: str):
+                    report(index, processed, current)
+                return wrapped_callback
+
+            workers = max(1, min(len(dir_counts), (os.cpu_count() or 1) * 2))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    None if path.exists() and path.is_file()
+                    else executor.submit(self.scanner.scan_directory, path, make_callback(index), self.cancel_event)
+                    for index, (path, _dir_total) in enumerate(dir_counts)
+                ]
+
+                # 統合（結果の順序を安定させるため paths の順に取り込む）
+                for index, ((path, dir_total), future) in enumerate(zip(dir_counts, futures)):
+                    if self.cancel_event.is_set():
+                        # 未着手のルートは走査しない（走査中のルートは途中までの結果を取り込む）
+                        executor.shutdown(wait=False, cancel_futures=True)
+
+                    if future is None:
+                        if self.cancel_event.is_set():
+                            continue
+                        self._accumulate_single_file(path)
+                        report(index, dir_total, str(path), force=True)
+                        self._append_log(f"processed {processed_global} / {total_files} files")
+                        continue
 
-            self._processed_files = processed_offset
+                    if future.cancelled():
+                        continue
+                    stats = future.result()
+
+                    # 並び順を保つため、先に保留中の単一ファイルを反映してからこのルートを取り込む
+                    self._flush_pending(combined_stats)
+                    for media_type, data in stats.items():
+                        bucket = _get_bucket(combined_stats, media_type)
+                        bucket["count"] += data["count"]
+                        bucket["size"] += data["size"]
+                        bucket["files"].extend(data["files"])
+                        bucket["source_folders"].add(path)
+                        bucket["extensions"].update(data["extensions"])
+
+                    # ルートの完了時は必ず通知（最終状態を表示させる）
+                    processed = dir_total if dir_total else sum(d["count"] for d in stats.values())
+                    report(index, processed, str(path), force=True)
+                    self._append_log(f"processed {processed_global} / {total_files} files")
+
+            self._flush_pending(combined_stats)
+            self._processed_files = processed_global
             
             elapsed = time.monotonic() - start_time
 
             if self.cancel_event.is_set():
-                final_stats = {}
-                for media_type, data in combined_stats.items():
-                    final_stats[media_type] = {
-                        "count": data["count"],
-                        "size": data["size"],
-                        "extensions": dict(data["extensions"]),
-                        "files": data["files"],
-                        "source_folders": list(data["source_folders"]),
-                    }
+                final_stats = _materialize_stats(combined_stats)
                 log_path = self._finalize_log("cancelled", elapsed)
                 if log_path:
                     self.log_ready.emit(str(log_path))
                 self.scan_cancelled.emit(final_stats)
                 return
 
-            final_stats = {}
-            for media_type, data in combined_stats.items():
-                final_stats[media_type] = {
-                    "count": data["count"],
-                    "size": data["size"],
-                    "extensions": dict(data["extensions"]),
-                    "files": data["files"],
-                    "source_folders": list(data["source_folders"]),
-                }
+            final_stats = _materialize_stats(combined_stats)
 
             log_path = self._finalize_log("completed", elapsed)
             if log_path:
@@ -259,6 +1029,232 @@ class ScannerThread(QThread):
             self.error_occurred.emit(str(e))
 
 
+def _csv_field(value: str) -> str:
+    """CSV の1フィールドを csv.writer（QUOTE_MINIMAL）と同じ規則で引用"""
+    if "," in value or '"' in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _export_template_preview_csv(preview_rows: List[Dict[str, str]]) -> Optional[Path]:
+    """テンプレート構築のプレビューCSVを出力。"""
+    if not preview_rows:
+        return None
+    try:
+        log_dir = _LOG_DIR
+        log_dir.mkdir(exist_ok=True)
+        path = log_dir / f"template_preview_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        # 列の形が決まっているので csv.writer を使わず行を組み立て、1回の write で書き出す
+        lines = ["source,target,folder,rule,template\r\n"]
+        lines.extend(
+            f"{_csv_field(row.get('source', ''))},{_csv_field(row.get('target', ''))},"
+            f"{_csv_field(row.get('folder', ''))},{_csv_field(row.get('rule', 'default'))},"
+            f"{_csv_field(row.get('template', ''))}\r\n"
+            for row in preview_rows
+        )
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write("".join(lines))
+        return path
+    except Exception:
+        return None
+
+
+class _ProgressThrottle:
+    """進捗通知の間引き（_PROGRESS_EMIT_EVERY 件ごと or _PROGRESS_EMIT_INTERVAL 秒ごとに due が True）"""
+
+    __slots__ = ("last_count", "last_time")
+
+    def __init__(self):
+        self.last_count = 0
+        self.last_time = 0.0
+
+    def due(self, count: int) -> bool:
+        now = time.monotonic()
+        if count - self.last_count >= _PROGRESS_EMIT_EVERY or now - self.last_time >= _PROGRESS_EMIT_INTERVAL:
+            self.last_count = count
+            self.last_time = now
+            return True
+        return False
+
+
+class FileOperationThread(QThread):
+    """Sort/Flatten の出力先決定とコピー/移動/リンクを UI スレッド外で実行"""
+
+    progress_updated = Signal(int, int)      # 処理済み, 総数
+    operation_completed = Signal(int, int)   # 成功数, エラー数
+
+    def __init__(self, files: List[str], dest_root: Path, operation_func, dry_run: bool):
+        super().__init__()
+        self.files = files
+        self.dest_root = dest_root
+        self.operation_func = operation_func
+        self.dry_run = dry_run
+
+    def run(self):
+        error_count = 0
+        total_files = len(self.files)
+        plan: List[Tuple[Path, Path]] = []
+        reserved = _PathReservations()
+        throttle = _ProgressThrottle()
+
+        # 出力先は先に逐次で決めておき、実際のコピー/移動だけを並列化する（階層は無視し1つのフォルダに集約）
+        for i, file_path_str in enumerate(self.files, 1):
+            if throttle.due(i):
+                self.progress_updated.emit(i, total_files)
+
+            source_path = Path(file_path_str)
+            if not source_path.exists():
+                error_count += 1
+                continue
+
+            final_path = _unique_path(self.dest_root, source_path.name, reserved, create_dir=False)
+            if not self.dry_run:
+                plan.append((source_path, final_path))
+        self.progress_updated.emit(total_files, total_files)
+
+        # 出力先フォルダはファイルごとではなく1回だけ作成
+        if plan:
+            try:
+                self.dest_root.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                pass  # 作成できなければ各操作がエラーとして数えられる
+
+        throttle = _ProgressThrottle()
+
+        def on_progress(done: int):
+            if throttle.due(done) or done == len(plan):
+                self.progress_updated.emit(done, len(plan))
+
+        succeeded, failed = _run_file_operations(self.operation_func, plan, on_progress)
+        self.operation_completed.emit(succeeded, error_count + failed)
+
+
+class TemplateBuildThread(QThread):
+    """テンプレート構築（出力先の解決とコピー/移動/リンク）を UI スレッド外で実行"""
+
+    progress_updated = Signal(int, int)   # 処理済み, 総数
+    build_completed = Signal(dict)        # 集計結果（成功・エラー数、フォルダ別・ルール別件数、プレビューCSV）
+
+    def __init__(
+        self,
+        files: List[str],
+        output_root: Path,
+        template: str,
+        *,
+        unknown_value: str,
+        export_preview: bool,
+        conditional_rules: List[Dict[str, Any]],
+        dry_run: bool,
+        operation_func,
+        roots: List[Tuple[str, int, Path]],
+    ):
+        super().__init__()
+        self.files = files
+        self.output_root = output_root
+        self.template = template
+        self.unknown_value = unknown_value
+        self.export_preview = export_preview
+        self.conditional_rules = conditional_rules
+        self.dry_run = dry_run
+        self.operation_func = operation_func
+        self.roots = roots
+
+    def run(self):
+        files = self.files
+        success_count = 0
+        error_count = 0
+        folder_stats: Dict[str, int] = defaultdict(int)
+        rule_hits: Dict[str, int] = defaultdict(int)
+        preview_rows: List[Dict[str, str]] = []
+        total_files = len(files)
+        plan: List[Tuple[Path, Path]] = []
+        reserved = _PathReservations()
+        dirs_needed: set = set()
+        throttle = _ProgressThrottle()
+        # テンプレートとルールで使うキーだけコンテキストを組み立てる
+        needed = _template_needed_tokens(self.template, self.conditional_rules)
+        self.progress_updated.emit(0, total_files)
+
+        # 大量のファイルは出力先の解決だけ先にプロセスプールでまとめて行う
+        resolved = None
+        if total_files > _TEMPLATE_PROCESS_POOL_THRESHOLD:
+            resolved = _resolve_templates_parallel(
+                files, self.template, self.conditional_rules, self.unknown_value, self.roots, needed
+            )
+
+        # 1. 出力先を逐次で決める（同名ファイルが同じ出力先にならないよう reserved で予約）
+        for i, file_path_str in enumerate(files, 1):
+            if throttle.due(i):
+                self.progress_updated.emit(i, total_files)
+
+            if resolved is not None:
+                resolution = resolved[i - 1]
+            else:
+                resolution = _resolve_template(
+                    file_path_str, self.template, self.conditional_rules, self.unknown_value, self.roots, needed
+                )
+            if resolution is None:
+                error_count += 1
+                continue
+
+            source_path = Path(file_path_str)
+            try:
+                rel_folder, selected_template, selected_rule = resolution
+                target_dir = self.output_root / rel_folder
+                final_path = _unique_path(target_dir, source_path.name, reserved, create_dir=False)
+                folder_stats[str(rel_folder)] += 1
+                rule_hits[selected_rule] += 1
+
+                if self.export_preview or self.dry_run:
+                    preview_rows.append(
+                        {
+                            "source": str(source_path),
+                            "target": str(final_path),
+                            "folder": str(rel_folder),
+                            "rule": selected_rule,
+                            "template": selected_template,
+                        }
+                    )
+
+                if self.dry_run:
+                    success_count += 1
+                else:
+                    plan.append((source_path, final_path))
+                    dirs_needed.add(target_dir)
+            except Exception:
+                error_count += 1
+        self.progress_updated.emit(total_files, total_files)
+
+        # 2. 出力先フォルダはファイルごとではなく、浅い順に1回ずつ作成
+        for target_dir in sorted(dirs_needed, key=lambda p: len(p.parts)):
+            try:
+                target_dir.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                pass  # 作成できなければ配下の各操作がエラーとして数えられる
+
+        # 3. コピー/移動/リンクはスレッドプールでまとめて実行
+        throttle = _ProgressThrottle()
+
+        def on_progress(done: int):
+            if throttle.due(done) or done == len(plan):
+                self.progress_updated.emit(done, len(plan))
+
+        succeeded, failed = _run_file_operations(self.operation_func, plan, on_progress)
+        success_count += succeeded
+        error_count += failed
+
+        preview_path = _export_template_preview_csv(preview_rows) if self.export_preview and preview_rows else None
+        self.build_completed.emit(
+            {
+                "success": success_count,
+                "errors": error_count,
+                "folder_stats": dict(folder_stats),
+                "rule_hits": dict(rule_hits),
+                "preview_path": str(preview_path) if preview_path else "",
+            }
+        )
+
+
 # DropAreaWidgetクラスを削除 - シンプルなQListWidgetで置き換え
 
 
@@ -282,6 +1278,50 @@ class OutputFolderDialog(QDialog):
         return {media: edit.text().strip() for media, edit in self.folder_edits.items()}
 
 
+# フォルダツリーの一覧取得で同時に scandir するスレッド数（ネットワークドライブでは待ちが主）
+_FOLDER_LIST_WORKERS = min(16, os.cpu_count() or 4)
+
+
+class FolderTreeThread(QThread):
+    """
+    フォルダツリー表示用の一覧取得（ディレクトリごとの scandir をスレッドプールで並列実行）
+    
+    親フォルダの一覧は必ず子フォルダより先に listing_ready で通知するので、
+    受け側は届いた順に項目を作ればよい。
+    """
+
+    listing_ready = Signal(str, list)   # フォルダパス, [(名前, パス, フォルダか)]
+
+    def __init__(self, root: Union[str, Path], max_depth: int = 1):
+        super().__init__()
+        self.root = os.fspath(root)
+        self.max_depth = max_depth
+        self.cancel_event = Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        if self.max_depth <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=_FOLDER_LIST_WORKERS) as pool:
+            pending = {pool.submit(_list_folder_entries, self.root): (self.root, 0)}
+            while pending and not self.cancel_event.is_set():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder, depth = pending.pop(future)
+                    entries = future.result()
+                    if entries is None or self.cancel_event.is_set():
+                        continue
+                    self.listing_ready.emit(folder, entries)
+                    if depth + 1 < self.max_depth:
+                        for _name, child, is_dir in entries:
+                            if is_dir:
+                                pending[pool.submit(_list_folder_entries, child)] = (child, depth + 1)
+            for future in pending:
+                future.cancel()
+
+
 class DryRunPreviewDialog(QDialog):
     """Dry-runプレビューダイアログ"""
     
@@ -364,26 +1404,37 @@ class DryRunPreviewDialog(QDialog):
         layout.addLayout(button_layout)
         
     def populate_detail_table(self):
-        """詳細テーブルにデータを設定"""
-        self.detail_table.setRowCount(len(self.selected_items))
+        """詳細テーブルにデータを設定（行データを先に作り、描画・シグナル・ソートを止めてまとめて挿入）"""
+        # 推定処理内容（Sort 以外は全行共通）
+        if self.operation == "Flatten":
+            fixed_action = "親ディレクトリに展開"
+        elif self.operation != "Sort":
+            fixed_action = "カスタム処理"
+        else:
+            fixed_action = None
         
-        for i, item in enumerate(self.selected_items):
+        rows = []
+        for item in self.selected_items:
             media_type = item.get('parent', item.get('type', 'unknown'))
             extension = item.get('type') if item.get('parent') else 'すべて'
             count = item.get('count', '0')
-            
-            # 推定処理内容
-            if self.operation == "Sort":
-                estimated_action = f"{media_type}フォルダに移動"
-            elif self.operation == "Flatten":
-                estimated_action = "親ディレクトリに展開"
-            else:
-                estimated_action = "カスタム処理"
-            
-            self.detail_table.setItem(i, 0, QTableWidgetItem(media_type))
-            self.detail_table.setItem(i, 1, QTableWidgetItem(extension))
-            self.detail_table.setItem(i, 2, QTableWidgetItem(str(count)))
-            self.detail_table.setItem(i, 3, QTableWidgetItem(estimated_action))
+            estimated_action = fixed_action or f"{media_type}フォルダに移動"
+            rows.append((media_type, extension, str(count), estimated_action))
+        
+        table = self.detail_table
+        sorting_enabled = table.isSortingEnabled()
+        table.setUpdatesEnabled(False)
+        table.blockSignals(True)
+        table.setSortingEnabled(False)
+        try:
+            table.setRowCount(len(rows))
+            for i, row in enumerate(rows):
+                for col, text in enumerate(row):
+                    table.setItem(i, col, QTableWidgetItem(text))
+        finally:
+            table.setSortingEnabled(sorting_enabled)
+            table.blockSignals(False)
+            table.setUpdatesEnabled(True)
             
     def save_to_csv(self):
         """CSV形式で保存"""
@@ -402,17 +1453,18 @@ class DryRunPreviewDialog(QDialog):
                     # ヘッダー
                     writer.writerow(['操作タイプ', '媒体タイプ', '拡張子', 'ファイル数', '推定処理', 'タイムスタンプ'])
                     
-                    # データ
-                    for item in self.selected_items:
-                        media_type = item.get('parent', item.get('type', 'unknown'))
-                        extension = item.get('type') if item.get('parent') else 'すべて'
-                        count = item.get('count', '0')
-                        estimated_action = f"{media_type}フォルダに移動" if self.operation == "Sort" else "親ディレクトリに展開"
-                        
-                        writer.writerow([
-                            self.operation, media_type, extension, count, 
-                            estimated_action, datetime.now().isoformat()
-                        ])
+                    # データ（タイムスタンプは全行共通）
+                    now = datetime.now().isoformat()
+                    
+                    def rows():
+                        for item in self.selected_items:
+                            media_type = item.get('parent', item.get('type', 'unknown'))
+                            extension = item.get('type') if item.get('parent') else 'すべて'
+                            count = item.get('count', '0')
+                            estimated_action = f"{media_type}フォルダに移動" if self.operation == "Sort" else "親ディレクトリに展開"
+                            yield [self.operation, media_type, extension, count, estimated_action, now]
+                    
+                    writer.writerows(rows())
                 
                 QMessageBox.information(self, "保存完了", f"Dry-run結果をCSVファイルに保存しました:\n{file_path}")
                 
@@ -430,19 +1482,24 @@ class DryRunPreviewDialog(QDialog):
         
         if file_path:
             try:
-                data = {
-                    "operation": self.operation,
-                    "timestamp": datetime.now().isoformat(),
-                    "mode": "dry_run",
-                    "selected_items": self.selected_items,
-                    "summary": {
-                        "total_items": len(self.selected_items),
-                        "total_files": sum(int(item.get('count', 0)) for item in self.selected_items)
-                    }
+                summary = {
+                    "total_items": len(self.selected_items),
+                    "total_files": sum(int(item.get('count', 0)) for item in self.selected_items)
                 }
                 
+                # 全体を1つの文字列にせず、項目ごとに書き出す
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                    f.write("{\n")
+                    f.write(f'  "operation": {dumps_compact_json(self.operation)},\n')
+                    f.write(f'  "timestamp": {dumps_compact_json(datetime.now().isoformat())},\n')
+                    f.write('  "mode": "dry_run",\n')
+                    f.write('  "selected_items": [')
+                    for i, item in enumerate(self.selected_items):
+                        f.write(",\n    " if i else "\n    ")
+                        f.write(dumps_compact_json(item))
+                    f.write("\n  ],\n" if self.selected_items else "],\n")
+                    f.write(f'  "summary": {dumps_compact_json(summary)}\n')
+                    f.write("}\n")
                 
                 QMessageBox.information(self, "保存完了", f"Dry-run結果をJSONファイルに保存しました:\n{file_path}")
                 
@@ -529,6 +1586,10 @@ class TemplateBuildDialog(QDialog):
         self.preview_check.setChecked(True)
         layout.addWidget(self.preview_check)
 
+        self.preserve_meta_check = QCheckBox("コピー時に更新日時・権限も複製する（オフにすると中身だけコピーして高速）")
+        self.preserve_meta_check.setChecked(True)
+        layout.addWidget(self.preserve_meta_check)
+
         self.conditional_check = QCheckBox("詳細設定を使う（条件分岐でテンプレートを切替）")
         self.conditional_check.setChecked(False)
         layout.addWidget(self.conditional_check)
@@ -625,7 +1686,7 @@ class TemplateBuildDialog(QDialog):
         if self.conditional_check.isChecked():
             text = self.rules_edit.toPlainText().strip()
             if text:
-                parsed = json.loads(text)
+                parsed = loads_json(text)
                 if not isinstance(parsed, list):
                     raise ValueError("条件分岐ルールはJSON配列で指定してください")
                 rules = parsed
@@ -633,12 +1694,13 @@ class TemplateBuildDialog(QDialog):
             "template": self.template_edit.text().strip(),
             "unknown": self.unknown_edit.text().strip() or "unknown",
             "export_preview": self.preview_check.isChecked(),
+            "preserve_meta": self.preserve_meta_check.isChecked(),
             "use_conditions": self.conditional_check.isChecked(),
             "rules": rules,
         }
 
     def _preset_dir(self) -> Path:
-        base = Path(__file__).resolve().parent.parent / "presets" / "template_build"
+        base = _PRESET_DIR
         base.mkdir(parents=True, exist_ok=True)
         return base
 
@@ -680,8 +1742,8 @@ class TemplateBuildDialog(QDialog):
         if not file_path:
             return
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(file_path, "wb") as f:
+                f.write(dumps_json(data))
             QMessageBox.information(self, "保存完了", f"プリセットを保存しました:\n{file_path}")
         except Exception as exc:
             QMessageBox.critical(self, "保存エラー", f"プリセット保存に失敗しました:\n{exc}")
@@ -696,13 +1758,14 @@ class TemplateBuildDialog(QDialog):
         if not file_path:
             return
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(file_path, "rb") as f:
+                data = loads_json(f.read())
             template = str(data.get("template", self.template_edit.text()))
             self._set_easy_pattern_from_template(template)
             self.template_edit.setText(template)
             self.unknown_edit.setText(str(data.get("unknown", self.unknown_edit.text())))
             self.preview_check.setChecked(bool(data.get("export_preview", True)))
+            self.preserve_meta_check.setChecked(bool(data.get("preserve_meta", True)))
             use_conditions = bool(data.get("use_conditions", False))
             self.conditional_check.setChecked(use_conditions)
             rules = data.get("rules", [])
@@ -725,9 +1788,14 @@ class AnalyzerWindow(QMainWindow):
         # データ管理
         self.selected_paths: List[Path] = []  # 複数パス管理
         self.scan_results: Dict[str, Any] = {}  # 走査結果保存
+        self._scan_index: Dict[str, Dict[str, List[str]]] = {}  # 媒体タイプ -> 拡張子 -> ファイル
         self.dry_run_mode: bool = True  # デフォルトシミュレーション ON
         self.scanner_thread: Optional[ScannerThread] = None
         self.analysis_buttons: List[QPushButton] = []
+        self.operation_buttons: List[QPushButton] = []  # Sort/Flatten/テンプレート構築（実行中は無効化）
+        self.operation_thread: Optional[QThread] = None
+        self.folder_list_threads: List[FolderTreeThread] = []  # フォルダツリーの一覧取得中のスレッド
+        self._drag_cache: Dict[str, bool] = {}  # ドラッグ中の URL -> 存在するか（ドラッグ操作ごとにクリア）
         self.is_scanning: bool = False
         self.latest_log_path: Optional[str] = None
         self.folder_placeholder_text = "ここにフォルダをドラッグ&ドロップ"
@@ -836,34 +1904,34 @@ class AnalyzerWindow(QMainWindow):
             return []
 
         files = []
+        seen = set()  # 重複排除（選択順を保ったまま1パスで）
+        parent_media: Dict[str, str] = {}  # 同じ媒体行の下を複数選択したとき媒体名の取り出しは1回
         for item in items:
             parent = item.parent()
             # 親がある＝拡張子行（媒体行は親がない）
             if parent is None:
                 continue
             
-            media = parent.text(0).replace("🎵 ", "").replace("🎥 ", "").replace("🖼️ ", "").replace("📄 ", "").replace("📦 ", "").replace("📁 ", "").strip().lower()
-            ext_text = item.text(0).replace("📄 ", "").strip()
+            # 一時的なラッパーの id は使い回されることがあるため、行の表示文字列で引く
+            label = parent.text(0)
+            media = parent_media.get(label)
+            if media is None:
+                media = parent_media[label] = _MEDIA_PREFIX_RE.sub("", label).strip().lower()
+            ext_text = _MEDIA_PREFIX_RE.sub("", item.text(0)).strip()
             ext = ext_text if ext_text != "(拡張子なし)" else ""
             
-            # scan_resultsから該当する実ファイルを取得
-            try:
-                if hasattr(self, 'scan_results') and self.scan_results:
-                    media_data = self.scan_results.get(media, {})
-                    if 'files' in media_data:
-                        # ファイルリストから拡張子でフィルタ
-                        for file_path in media_data['files']:
-                            file_ext = Path(file_path).suffix.lower()
-                            if file_ext == ext or (not ext and not file_ext):
-                                files.append(str(file_path))
-            except Exception:
-                pass
+            # 走査結果の索引から該当する実ファイルを取得
+            for file_path in self._scan_index.get(media, {}).get(ext, []):
+                if file_path not in seen:
+                    seen.add(file_path)
+                    files.append(file_path)
         
-        # 重複排除
-        return list(dict.fromkeys(files))
+        return files
     
     def _on_sort_clicked(self):
         """整理実行ボタンクリック時の処理"""
+        if self._is_operation_running():
+            return
         selected = self._selected_files_from_result()
         if not selected:
             QMessageBox.warning(self, "警告", "処理対象を選択してください（拡張子行を選択）")
@@ -876,6 +1944,8 @@ class AnalyzerWindow(QMainWindow):
     
     def _on_flatten_clicked(self):
         """階層削除ボタンクリック時の処理"""
+        if self._is_operation_running():
+            return
         selected = self._selected_files_from_result()
         if not selected:
             QMessageBox.warning(self, "警告", "処理対象を選択してください（拡張子行を選択）")
@@ -888,6 +1958,8 @@ class AnalyzerWindow(QMainWindow):
 
     def _on_template_build_clicked(self):
         """テンプレート構築ボタンクリック時の処理"""
+        if self._is_operation_running():
+            return
         selected = self._selected_files_from_result()
         if not selected:
             QMessageBox.warning(self, "警告", "処理対象を選択してください（拡張子行を選択）")
@@ -920,13 +1992,13 @@ class AnalyzerWindow(QMainWindow):
             template,
             unknown_value=values.get("unknown", "unknown"),
             export_preview=bool(values.get("export_preview", False)),
-            conditional_rules=values.get("rules", []) if values.get("use_conditions") else [],
+            preserve_meta=bool(values.get("preserve_meta", True)),
+            conditional_rules=_compile_rules(values.get("rules", [])) if values.get("use_conditions") else [],
             dry_run=is_dry_run,
         )
 
-    def _selected_root_for_file(self, file_path: Path) -> Optional[Path]:
-        """選択済みルートから最も深く一致する親フォルダを返す。"""
-        candidates: List[Path] = []
+    def _template_roots(self) -> List[Tuple[str, int, Path]]:
+        """選択済みルート（重複除去済み）を _prepare_roots の形で返す。テンプレート構築ごとに1回だけ呼ぶ"""
         roots: List[Path] = []
 
         if self.selected_paths:
@@ -954,233 +2026,7 @@ class AnalyzerWindow(QMainWindow):
                 continue
             seen.add(key)
             unique_roots.append(root)
-
-        for root in unique_roots:
-            try:
-                file_path.relative_to(root)
-                candidates.append(root)
-            except Exception:
-                continue
-
-        if not candidates:
-            return None
-
-        candidates.sort(key=lambda p: len(str(p)), reverse=True)
-        return candidates[0]
-
-    def _sanitize_segment(self, text: str, unknown_value: str) -> str:
-        """フォルダ名セグメントを安全化。"""
-        value = (text or "").strip()
-        if not value:
-            return unknown_value
-
-        value = value.replace("\\", "_").replace("/", "_")
-        value = re.sub(r'[<>:"|?*\x00-\x1f]', "_", value)
-        value = value.strip(" .")
-        return value or unknown_value
-
-    def _build_template_context(self, file_path: Path, unknown_value: str) -> Dict[str, Any]:
-        """テンプレート置換用のコンテキストを構築。"""
-        ext_dot = file_path.suffix.lower()
-        ext = ext_dot.lstrip(".")
-        media_type = FileScanner.detect_media_type(ext_dot)
-
-        try:
-            mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-        except Exception:
-            mtime = datetime.now()
-
-        size_bytes = 0
-        try:
-            size_bytes = file_path.stat().st_size
-        except Exception:
-            pass
-
-        size_mb = size_bytes / (1024 * 1024) if size_bytes else 0
-        if size_mb < 1:
-            size_band = "tiny"
-        elif size_mb < 10:
-            size_band = "small"
-        elif size_mb < 100:
-            size_band = "medium"
-        elif size_mb < 1024:
-            size_band = "large"
-        else:
-            size_band = "huge"
-
-        root = self._selected_root_for_file(file_path)
-        rel_dir = ""
-        top_folder = unknown_value
-        parent_1 = parent_2 = parent_3 = unknown_value
-        parent = file_path.parent.name or unknown_value
-        if root:
-            try:
-                rel_parent = file_path.parent.relative_to(root)
-                rel_parts = [p for p in rel_parent.parts if p not in (".", "")]
-                rel_dir = "/".join(rel_parts)
-                if rel_parts:
-                    top_folder = rel_parts[0]
-                    parent_1 = rel_parts[-1]
-                    if len(rel_parts) >= 2:
-                        parent_2 = rel_parts[-2]
-                    if len(rel_parts) >= 3:
-                        parent_3 = rel_parts[-3]
-            except Exception:
-                pass
-
-        return {
-            "media_type": media_type,
-            "ext": ext or unknown_value,
-            "ext_dot": ext_dot or unknown_value,
-            "year": f"{mtime.year:04d}",
-            "month": f"{mtime.month:02d}",
-            "day": f"{mtime.day:02d}",
-            "hour": f"{mtime.hour:02d}",
-            "name": file_path.name,
-            "stem": file_path.stem,
-            "size_band": size_band,
-            "top_folder": top_folder,
-            "parent": parent,
-            "parent_1": parent_1,
-            "parent_2": parent_2,
-            "parent_3": parent_3,
-            "rel_dir": rel_dir or unknown_value,
-            "size_mb": round(size_mb, 4),
-            "size_bytes": size_bytes,
-            "path": str(file_path),
-        }
-
-    def _normalize_ext_value(self, value: str) -> str:
-        raw = (value or "").strip().lower()
-        if not raw:
-            return ""
-        return raw if raw.startswith(".") else f".{raw}"
-
-    def _rule_matches(self, when: Dict[str, Any], context: Dict[str, Any], file_path: Path) -> bool:
-        """Evaluate one conditional rule."""
-        if not when:
-            return True
-
-        media_type = str(context.get("media_type", "")).lower()
-        ext_dot = self._normalize_ext_value(str(context.get("ext_dot", "")))
-        size_mb = float(context.get("size_mb", 0) or 0)
-        size_band = str(context.get("size_band", "")).lower()
-        year = str(context.get("year", ""))
-        month = str(context.get("month", ""))
-        day = str(context.get("day", ""))
-        path_str = str(file_path)
-        name_str = file_path.name
-
-        if "media_type" in when:
-            expected = when.get("media_type")
-            if isinstance(expected, list):
-                if media_type not in [str(x).lower() for x in expected]:
-                    return False
-            elif media_type != str(expected).lower():
-                return False
-
-        if "ext" in when:
-            expected_ext = when.get("ext")
-            if isinstance(expected_ext, list):
-                normalized = [self._normalize_ext_value(str(x)) for x in expected_ext]
-                if ext_dot not in normalized:
-                    return False
-            else:
-                if ext_dot != self._normalize_ext_value(str(expected_ext)):
-                    return False
-
-        if "min_size_mb" in when:
-            try:
-                if size_mb < float(when.get("min_size_mb")):
-                    return False
-            except Exception:
-                return False
-
-        if "max_size_mb" in when:
-            try:
-                if size_mb > float(when.get("max_size_mb")):
-                    return False
-            except Exception:
-                return False
-
-        if "size_band" in when:
-            expected_band = when.get("size_band")
-            if isinstance(expected_band, list):
-                if size_band not in [str(x).lower() for x in expected_band]:
-                    return False
-            elif size_band != str(expected_band).lower():
-                return False
-
-        if "year" in when and year != str(when.get("year")):
-            return False
-        if "month" in when and month != str(when.get("month")).zfill(2):
-            return False
-        if "day" in when and day != str(when.get("day")).zfill(2):
-            return False
-
-        if "path_contains" in when and str(when.get("path_contains")) not in path_str:
-            return False
-        if "name_contains" in when and str(when.get("name_contains")) not in name_str:
-            return False
-
-        return True
-
-    def _select_template_by_rules(
-        self,
-        default_template: str,
-        rules: List[Dict[str, Any]],
-        context: Dict[str, Any],
-        file_path: Path,
-    ) -> Dict[str, str]:
-        """Select template using first matching rule."""
-        for idx, rule in enumerate(rules):
-            if not isinstance(rule, dict):
-                continue
-            when = rule.get("when", {})
-            template = str(rule.get("template", "")).strip()
-            if not template:
-                continue
-            if self._rule_matches(when if isinstance(when, dict) else {}, context, file_path):
-                rule_name = str(rule.get("name", f"rule_{idx+1}")).strip() or f"rule_{idx+1}"
-                return {"template": template, "rule": rule_name}
-        return {"template": default_template, "rule": "default"}
-
-    def _render_template_folder(self, template: str, context: Dict[str, str], unknown_value: str) -> Path:
-        """テンプレートを展開して相対フォルダパスを返す。"""
-        rendered = template
-
-        for token in re.findall(r"\{([a-zA-Z0-9_]+)\}", template):
-            value = context.get(token, unknown_value)
-            rendered = rendered.replace("{" + token + "}", self._sanitize_segment(str(value), unknown_value))
-
-        raw_parts = [p for p in rendered.replace("\\", "/").split("/") if p]
-        safe_parts = [self._sanitize_segment(p, unknown_value) for p in raw_parts if p not in (".", "..")]
-        if not safe_parts:
-            safe_parts = [unknown_value]
-        return Path(*safe_parts)
-
-    def _export_template_preview_csv(self, preview_rows: List[Dict[str, str]]) -> Optional[Path]:
-        """テンプレート構築のプレビューCSVを出力。"""
-        if not preview_rows:
-            return None
-        try:
-            log_dir = Path(__file__).resolve().parent.parent / "logs"
-            log_dir.mkdir(exist_ok=True)
-            path = log_dir / f"template_preview_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(["source", "target", "folder", "rule", "template"])
-                for row in preview_rows:
-                    writer.writerow([
-                        row.get("source", ""),
-                        row.get("target", ""),
-                        row.get("folder", ""),
-                        row.get("rule", "default"),
-                        row.get("template", ""),
-                    ])
-            return path
-        except Exception:
-            return None
+        return _prepare_roots(unique_roots)
 
     def _start_template_build(
         self,
@@ -1192,66 +2038,47 @@ class AnalyzerWindow(QMainWindow):
         export_preview: bool,
         conditional_rules: List[Dict[str, Any]],
         dry_run: bool,
+        preserve_meta: bool = True,
     ):
-        """テンプレートに従ってフォルダ構造を構築しながら処理。"""
+        """テンプレートに従ってフォルダ構造を構築しながら処理（ワーカースレッドで実行）。"""
         mode = "copy"
         if hasattr(self, "operation_group"):
             idx = self.operation_group.checkedId()
             mode = {0: "copy", 1: "move", 2: "link"}.get(idx, "copy")
 
-        operations = {"copy": _op_copy, "move": _op_move, "link": _op_link}
+        operations = {"copy": _op_copy if preserve_meta else _op_copy_data, "move": move_file, "link": _op_link}
         operation_func = operations[mode]
 
-        success_count = 0
-        error_count = 0
-        folder_stats: Dict[str, int] = defaultdict(int)
-        rule_hits: Dict[str, int] = defaultdict(int)
-        preview_rows: List[Dict[str, str]] = []
-        total_files = len(files)
-
-        for i, file_path_str in enumerate(files, 1):
-            if hasattr(self, "status_bar"):
-                self.status_bar.showMessage(f"テンプレート構築中... {i}/{total_files}")
-            QApplication.processEvents()
-
-            source_path = Path(file_path_str)
-            if not source_path.exists() or not source_path.is_file():
-                error_count += 1
-                continue
-
-            try:
-                context = self._build_template_context(source_path, unknown_value)
-                selected = self._select_template_by_rules(template, conditional_rules, context, source_path)
-                selected_template = selected["template"]
-                selected_rule = selected["rule"]
-                rel_folder = self._render_template_folder(selected_template, context, unknown_value)
-                target_dir = output_root / rel_folder
-                final_path = _unique_path(target_dir, source_path.name)
-                folder_stats[str(rel_folder)] += 1
-                rule_hits[selected_rule] += 1
-
-                if export_preview or dry_run:
-                    preview_rows.append(
-                        {
-                            "source": str(source_path),
-                            "target": str(final_path),
-                            "folder": str(rel_folder),
-                            "rule": selected_rule,
-                            "template": selected_template,
-                        }
-                    )
-
-                if not dry_run:
-                    final_path.parent.mkdir(parents=True, exist_ok=True)
-                    operation_func(source_path, final_path)
-
-                success_count += 1
-            except Exception:
-                error_count += 1
+        thread = TemplateBuildThread(
+            files,
+            output_root,
+            template,
+            unknown_value=unknown_value,
+            export_preview=export_preview,
+            conditional_rules=conditional_rules,
+            dry_run=dry_run,
+            operation_func=operation_func,
+            roots=self._template_roots(),
+        )
+        thread.build_completed.connect(
+            lambda result: self._on_template_build_completed(
+                result, template, mode, len(conditional_rules), dry_run
+            )
+        )
+        self._start_operation_thread(thread, "テンプレート構築中...")
 
-        preview_path = self._export_template_preview_csv(preview_rows) if export_preview and preview_rows else None
+    def _on_template_build_completed(
+        self,
+        result: Dict[str, Any],
+        template: str,
+        mode: str,
+        rule_count: int,
+        dry_run: bool,
+    ):
+        """テンプレート構築の結果を表示"""
+        folder_stats = result["folder_stats"]
         top_folders = sorted(folder_stats.items(), key=lambda x: x[1], reverse=True)[:8]
-        top_rules = sorted(rule_hits.items(), key=lambda x: x[1], reverse=True)[:8]
+        top_rules = sorted(result["rule_hits"].items(), key=lambda x: x[1], reverse=True)[:8]
         folder_preview = "\n".join([f"  - {name}: {count}" for name, count in top_folders]) if top_folders else "  - なし"
         rule_preview = "\n".join([f"  - {name}: {count}" for name, count in top_rules]) if top_rules else "  - default: 0"
 
@@ -1259,23 +2086,47 @@ class AnalyzerWindow(QMainWindow):
             f"テンプレート構築 完了\n\n"
             f"テンプレート: {template}\n"
             f"操作: {mode}\n"
-            f"条件ルール数: {len(conditional_rules)}\n"
-            f"成功: {success_count}\n"
-            f"エラー: {error_count}\n"
+            f"条件ルール数: {rule_count}\n"
+            f"成功: {result['success']}\n"
+            f"エラー: {result['errors']}\n"
             f"生成フォルダ数: {len(folder_stats)}\n"
             f"上位フォルダ:\n{folder_preview}\n"
             f"ルール適用件数:\n{rule_preview}"
         )
         if dry_run:
             result_msg = "[Dry-run] " + result_msg
-        if preview_path:
-            result_msg += f"\n\nプレビューCSV: {preview_path}"
+        if result["preview_path"]:
+            result_msg += f"\n\nプレビューCSV: {result['preview_path']}"
 
         QMessageBox.information(self, "結果", result_msg)
-    
+
+    def _start_operation_thread(self, thread: QThread, progress_text: str):
+        """Sort/Flatten/テンプレート構築のスレッドを開始（実行中は操作ボタンを無効化）"""
+        self._set_operation_controls_enabled(False)
+        if hasattr(self, "status_bar"):
+            thread.progress_updated.connect(
+                lambda done, total: self.status_bar.showMessage(f"{progress_text} {done}/{total}")
+            )
+        thread.finished.connect(lambda: self._set_operation_controls_enabled(True))
+        self.operation_thread = thread  # 実行中に破棄されないよう参照を保持
+        thread.start()
+
+    def _is_operation_running(self) -> bool:
+        thread = getattr(self, "operation_thread", None)
+        return thread is not None and thread.isRunning()
+
+    def _register_operation_button(self, button: QPushButton):
+        if button not in self.operation_buttons:
+            self.operation_buttons.append(button)
+
+    def _set_operation_controls_enabled(self, enabled: bool):
+        for button in self.operation_buttons:
+            button.setEnabled(enabled)
+
     def _start_sort(self, files: List[str], dry_run: bool):
         """整理（Sort）の実行"""
         # 可能なら既存 core を優先、なければ内製
+        _core_perform_sort, _ = _get_core_ops()
         if _core_perform_sort and not dry_run:
             try:
                 _core_perform_sort(files)
@@ -1296,43 +2147,18 @@ class AnalyzerWindow(QMainWindow):
             idx = self.operation_group.checkedId()
             mode = {0: "copy", 1: "move", 2: "link"}.get(idx, "copy")
 
-        operations = {"copy": _op_copy, "move": _op_move, "link": _op_link}
+        operations = {"copy": _op_copy, "move": move_file, "link": _op_link}
         operation_func = operations[mode]
 
-        # 進捗
-        success_count = error_count = 0
-        total_files = len(files)
-        
-        for i, file_path_str in enumerate(files, 1):
-            if hasattr(self, 'status_bar'):
-                self.status_bar.showMessage(f"整理中... {i}/{total_files}")
-            QApplication.processEvents()
-
-            source_path = Path(file_path_str)
-            if not source_path.exists():
-                error_count += 1
-                continue
-                
-            # 媒体タイプ別フォルダ作成（簡易版）
-            dest_dir = dest_root
-            final_path = _unique_path(dest_dir, source_path.name)
-            
-            if dry_run:
-                continue
-                
-            try:
-                operation_func(source_path, final_path)
-                success_count += 1
-            except Exception:
-                error_count += 1
-
-        result_msg = f"整理完了: 成功 {success_count}, エラー {error_count}"
-        if dry_run:
-            result_msg = f"[Dry-run] " + result_msg
-        QMessageBox.information(self, "結果", result_msg)
+        thread = FileOperationThread(files, dest_root, operation_func, dry_run)
+        thread.operation_completed.connect(
+            lambda succeeded, failed: self._show_operation_result("整理完了", succeeded, failed, dry_run)
+        )
+        self._start_operation_thread(thread, "整理中...")
     
     def _start_flatten(self, files: List[str], dry_run: bool):
         """階層削除（Flatten）の実行"""
+        _, _core_perform_flatten = _get_core_ops()
         if _core_perform_flatten and not dry_run:
             try:
                 _core_perform_flatten(files)
@@ -1351,34 +2177,18 @@ class AnalyzerWindow(QMainWindow):
             idx = self.operation_group.checkedId()
             mode = {0: "copy", 1: "move", 2: "link"}.get(idx, "copy")
         
-        operations = {"copy": _op_copy, "move": _op_move, "link": _op_link}
+        operations = {"copy": _op_copy, "move": move_file, "link": _op_link}
         operation_func = operations[mode]
 
-        success_count = error_count = 0
-        total_files = len(files)
-        
-        for i, file_path_str in enumerate(files, 1):
-            if hasattr(self, 'status_bar'):
-                self.status_bar.showMessage(f"Flatten中... {i}/{total_files}")
-            QApplication.processEvents()
-
-            source_path = Path(file_path_str)
-            if not source_path.exists():
-                error_count += 1
-                continue
-                
-            final_path = _unique_path(dest_root, source_path.name)
-            
-            if dry_run:
-                continue
-                
-            try:
-                operation_func(source_path, final_path)   # 階層は無視し1つのフォルダに集約
-                success_count += 1
-            except Exception:
-                error_count += 1
+        thread = FileOperationThread(files, dest_root, operation_func, dry_run)
+        thread.operation_completed.connect(
+            lambda succeeded, failed: self._show_operation_result("Flatten完了", succeeded, failed, dry_run)
+        )
+        self._start_operation_thread(thread, "Flatten中...")
 
-        result_msg = f"Flatten完了: 成功 {success_count}, エラー {error_count}"
+    def _show_operation_result(self, title: str, success_count: int, error_count: int, dry_run: bool):
+        """Sort/Flatten の結果を表示"""
+        result_msg = f"{title}: 成功 {success_count}, エラー {error_count}"
         if dry_run:
             result_msg = f"[Dry-run] " + result_msg
         QMessageBox.information(self, "結果", result_msg)
@@ -1489,16 +2299,19 @@ class AnalyzerWindow(QMainWindow):
         sort_btn = QPushButton("整理実行")
         sort_btn.clicked.connect(self._on_sort_clicked)
         layout.addWidget(sort_btn)
+        self._register_operation_button(sort_btn)
         
         # 階層削除
         flatten_btn = QPushButton("階層削除")
         flatten_btn.clicked.connect(self._on_flatten_clicked)
         layout.addWidget(flatten_btn)
+        self._register_operation_button(flatten_btn)
 
         # テンプレート構築
         template_btn = QPushButton("テンプレート構築")
         template_btn.clicked.connect(self._on_template_build_clicked)
         layout.addWidget(template_btn)
+        self._register_operation_button(template_btn)
         
         layout.addWidget(QLabel("|"))
         
@@ -1547,6 +2360,8 @@ class AnalyzerWindow(QMainWindow):
         self.folder_tree.dragEnterEvent = self.folder_tree_drag_enter_event
         self.folder_tree.dragMoveEvent = self.folder_tree_drag_move_event
         self.folder_tree.dropEvent = self.folder_tree_drop_event
+        # サブフォルダの中身は展開時に取得
+        self.folder_tree.itemExpanded.connect(self._on_folder_item_expanded)
         
         # ドロップエリアの説明（ツリーが空の時に表示）
         self.folder_tree.setStyleSheet("""
@@ -1568,9 +2383,9 @@ class AnalyzerWindow(QMainWindow):
 
     def folder_tree_drag_enter_event(self, event):
         """フォルダツリーへのドラッグエンター"""
+        self._drag_cache = {}  # 新しいドラッグ操作
         if event.mimeData().hasUrls():
-            has_paths = any(Path(url.toLocalFile()).exists() for url in event.mimeData().urls())
-            if has_paths:
+            if self._drag_has_paths(event):
                 event.acceptProposedAction()
                 return
         event.ignore()
@@ -1578,14 +2393,14 @@ class AnalyzerWindow(QMainWindow):
     def folder_tree_drag_move_event(self, event):
         """フォルダツリーへのドラッグムーブ"""
         if event.mimeData().hasUrls():
-            has_paths = any(Path(url.toLocalFile()).exists() for url in event.mimeData().urls())
-            if has_paths:
+            if self._drag_has_paths(event):
                 event.acceptProposedAction()
                 return
         event.ignore()
 
     def folder_tree_drop_event(self, event):
         """フォルダツリーへのドロップ（ファイル/フォルダ両対応）"""
+        self._drag_cache = {}
         if not event.mimeData().hasUrls():
             event.ignore()
             return
@@ -1702,13 +2517,15 @@ class AnalyzerWindow(QMainWindow):
             QMessageBox.information(self, "情報", "追加できるファイルがありませんでした。")
 
     def add_path_item(self, path: Path) -> bool:
-        """フォルダまたはファイルを解析対象に追加"""
-        if not path.exists():
+        """フォルダまたはファイルを解析対象に追加（存在と種別は stat 1回で判定）"""
+        try:
+            mode = os.stat(path).st_mode
+        except (OSError, ValueError):
             return False
-        if path.is_dir():
+        if stat.S_ISDIR(mode):
             self.add_folder_with_structure(path)
             return True
-        if path.is_file():
+        if stat.S_ISREG(mode):
             return self.add_file_item(path)
         return False
 
@@ -1727,6 +2544,7 @@ class AnalyzerWindow(QMainWindow):
 
         file_item = QTreeWidgetItem(self.folder_tree, [f"📄 {file_path.name}"])
         file_item.setData(0, Qt.UserRole, path_str)
+        file_item.setData(0, _PATH_KIND_ROLE, "file")
         file_item.setToolTip(0, path_str)
         self.update_statistics()
         return True
@@ -1740,68 +2558,120 @@ class AnalyzerWindow(QMainWindow):
                 self.folder_tree.clear()
         
         # 既存チェック
+        path_str = str(folder_path)
         for i in range(self.folder_tree.topLevelItemCount()):
             existing_item = self.folder_tree.topLevelItem(i)
-            if existing_item.data(0, Qt.UserRole) == str(folder_path):
+            if existing_item.data(0, Qt.UserRole) == path_str:
                 return  # 既に存在する
         
         root_item = QTreeWidgetItem(self.folder_tree, [folder_path.name])
-        root_item.setData(0, Qt.UserRole, str(folder_path))
-        root_item.setToolTip(0, str(folder_path))
+        root_item.setData(0, Qt.UserRole, path_str)
+        root_item.setData(0, _PATH_KIND_ROLE, "dir")
+        root_item.setToolTip(0, path_str)
         
-        # サブフォルダを追加
-        self.add_subfolders(root_item, folder_path)
-        root_item.setExpanded(True)
+        # 直下の一覧だけワーカースレッドで取得（ルートの展開は直下の項目を追加するとき）。
+        # それより下は展開されたときに取得する
+        self._start_folder_listing(root_item, path_str)
         
         # 統計更新
         self.update_statistics()
 
-    def add_subfolders(self, parent_item, folder_path: Path, depth=0, max_depth=3):
-        """サブフォルダ追加でUserRole必須設定"""
-        if depth >= max_depth:
+    def _start_folder_listing(self, folder_item, folder_path: Union[str, Path], max_depth: int = 1):
+        """folder_item 配下の一覧を FolderTreeThread で取得開始（既定は直下だけ）"""
+        folder_item.setData(0, _LISTED_ROLE, True)
+        items = {os.fspath(folder_path): folder_item}  # フォルダパス -> ツリー項目（このスレッド分）
+        thread = FolderTreeThread(folder_path, max_depth)
+        thread.listing_ready.connect(
+            lambda folder, entries: self._on_folder_listing(items, folder, entries)
+        )
+        thread.finished.connect(lambda: self._on_folder_listing_finished(thread))
+        self.folder_list_threads.append(thread)  # 実行中に破棄されないよう参照を保持
+        thread.start()
+
+    def _on_folder_listing(self, items: Dict[str, Any], folder: str, entries: List[Tuple[str, str, bool]]):
+        """FolderTreeThread から届いた1フォルダ分の一覧をツリーに追加（UserRole必須設定）"""
+        parent_item = items.get(folder)
+        if parent_item is None:
             return
+        show_files = hasattr(self, 'show_files_check') and self.show_files_check.isChecked()
+        # 親に付けない状態で項目を作り、addChildren で1回に追加する
+        batch = []
+        for name, path_str, is_dir in entries:
+            if is_dir:
+                it = QTreeWidgetItem([name])
+                it.setData(0, Qt.UserRole, path_str)  # ★必須
+                it.setToolTip(0, path_str)
+                # 中身は展開されるまで取得しないので、展開矢印だけ出しておく
+                it.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+                batch.append(it)
+                items[path_str] = it
+            elif show_files:
+                # ファイル表示がオンの場合
+                file_it = QTreeWidgetItem([f"📄 {name}"])
+                file_it.setData(0, Qt.UserRole, path_str)  # ★ファイルもUserRole設定
+                file_it.setToolTip(0, path_str)
+                batch.append(file_it)
         try:
-            for child in sorted(folder_path.iterdir()):
-                if child.name.startswith('.'):
-                    continue
-                if child.is_dir():
-                    it = QTreeWidgetItem(parent_item, [child.name])
-                    it.setData(0, Qt.UserRole, str(child))  # ★必須
-                    it.setToolTip(0, str(child))
-                    self.add_subfolders(it, child, depth+1, max_depth)
-                elif hasattr(self, 'show_files_check') and self.show_files_check.isChecked():
-                    # ファイル表示がオンの場合
-                    file_it = QTreeWidgetItem(parent_item, [f"📄 {child.name}"])
-                    file_it.setData(0, Qt.UserRole, str(child))  # ★ファイルもUserRole設定
-                    file_it.setToolTip(0, str(child))
-        except PermissionError:
-            pass
-
-    def add_all_items(self, parent_item, folder_path: Path, include_files: bool, max_depth: int, current_depth: int = 0):
-        """フォルダとファイルを再帰的に追加（深さ制限付き）"""
+            with _suspend_tree_updates(self.folder_tree):
+                # 一覧が届いたフォルダは、空なら展開矢印を消す
+                parent_item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+                if not batch:
+                    return
+                parent_item.addChildren(batch)
+                # 開いておくのはルート（トップレベル）だけ。子を追加した時点で1回だけ展開する
+                if parent_item.parent() is None:
+                    parent_item.setExpanded(True)
+        except RuntimeError:
+            # 一覧取得中に項目が削除された（名前一致削除など）
+            items.pop(folder, None)
+
+    def _on_folder_item_expanded(self, item):
+        """まだ一覧を取得していないフォルダが展開されたら、直下の一覧を取得"""
+        if item.data(0, _LISTED_ROLE):
+            return
+        path_str = item.data(0, Qt.UserRole)
+        if path_str:
+            self._start_folder_listing(item, path_str)
+
+    def _on_folder_listing_finished(self, thread: FolderTreeThread):
+        if thread in self.folder_list_threads:
+            self.folder_list_threads.remove(thread)
+
+    def _cancel_folder_listings(self):
+        """ツリーを作り直す前に、一覧取得中のスレッドを止めて以降の通知を捨てる"""
+        for thread in self.folder_list_threads:
+            thread.cancel()
+            try:
+                thread.listing_ready.disconnect()
+            except (RuntimeError, TypeError):
+                pass
+
+    def add_all_items(self, parent_item, folder_path: Union[str, Path], include_files: bool, max_depth: int, current_depth: int = 0):
+        """フォルダとファイルを再帰的に追加（深さ制限付き。os.scandir の DirEntry で種別・サイズを取る）"""
         if current_depth >= max_depth:
             return
         
         try:
-            items = list(folder_path.iterdir())
-            items.sort(key=lambda x: (x.is_file(), x.name.lower()))
+            with os.scandir(folder_path) as it:
+                items = list(it)
+            items.sort(key=lambda e: (_entry_is_file(e), e.name.lower()))
             
             for item in items[:1000]:  # 大量ファイル対策
-                if item.name.startswith('.'):  # 隠しファイルスキップ
+                if _is_hidden_name(item.name):  # 隠しファイルスキップ
                     continue
                     
                 child_item = QTreeWidgetItem(parent_item)
                 
-                if item.is_dir():
+                if _entry_is_dir(item):
                     child_item.setText(0, f"📁 {item.name}")
-                    child_item.setData(0, Qt.UserRole, str(item))
+                    child_item.setData(0, Qt.UserRole, item.path)
                     # 再帰的にサブフォルダを追加
-                    self.add_all_items(child_item, item, include_files, max_depth, current_depth + 1)
+                    self.add_all_items(child_item, item.path, include_files, max_depth, current_depth + 1)
                     
                 elif include_files:
                     # ファイルを表示
                     child_item.setText(0, f"📄 {item.name}")
-                    child_item.setData(0, Qt.UserRole, str(item))
+                    child_item.setData(0, Qt.UserRole, item.path)
                     # ファイルサイズを追加情報として表示
                     try:
                         size_mb = item.stat().st_size / 1024 / 1024
@@ -1817,21 +2687,21 @@ class AnalyzerWindow(QMainWindow):
     
     def refresh_folder_tree(self):
         """ファイル表示切り替え時にツリーを再構築"""
-        # 現在の対象（フォルダ/ファイル）を保存
+        # 現在の対象（フォルダ/ファイル）を保存（存在確認は add_path_item の stat 1回に任せる）
         paths = []
         for i in range(self.folder_tree.topLevelItemCount()):
             item = self.folder_tree.topLevelItem(i)
             path_str = item.data(0, Qt.UserRole)
             if path_str:
-                p = Path(path_str)
-                if p.exists():
-                    paths.append(p)
+                paths.append(Path(path_str))
         
         # ツリーをクリアして再構築
-        self.folder_tree.clear()
-        for p in paths:
-            self.add_path_item(p)
-        self._add_placeholder_if_empty()
+        self._cancel_folder_listings()
+        with _suspend_tree_updates(self.folder_tree):
+            self.folder_tree.clear()
+            for p in paths:
+                self.add_path_item(p)
+            self._add_placeholder_if_empty()
 
     def _add_placeholder_if_empty(self):
         """Ensure placeholder guidance item is present when tree is empty."""
@@ -1861,6 +2731,9 @@ class AnalyzerWindow(QMainWindow):
 
     def remove_folders_by_name(self):
         """名前一致でフォルダを削除するダイアログを表示"""
+        # 使うときだけ読み込む（起動時の import を減らす）
+        from .folder_tools import FolderNameDeleteDialog, MATCH_EXACT, remove_folders_matching_query
+
         dialog = FolderNameDeleteDialog(self)
         if dialog.exec() != QDialog.Accepted:
             return
@@ -1897,18 +2770,30 @@ class AnalyzerWindow(QMainWindow):
         """すべてのフォルダをクリア"""
         reply = QMessageBox.question(self, "確認", "すべてのフォルダをクリアしますか？")
         if reply == QMessageBox.Yes:
+            self._cancel_folder_listings()
             self.folder_tree.clear()
             self.result_tree.clear()
             # プレースホルダーを追加
             self._add_placeholder_if_empty()
             self.status_bar.showMessage("フォルダリストをクリアしました")
     
+    def _drag_has_paths(self, event) -> bool:
+        """ドラッグ中の URL に存在するパスがあるか（存在確認はドラッグ操作中 URL ごとに1回）"""
+        cache = self._drag_cache
+        for url in event.mimeData().urls():
+            key = url.toLocalFile()
+            exists = cache.get(key)
+            if exists is None:
+                exists = cache[key] = Path(key).exists()
+            if exists:
+                return True
+        return False
+
     def dragEnterEvent(self, event):
         """ドラッグエンター時の処理"""
+        self._drag_cache = {}  # 新しいドラッグ操作
         if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            has_paths = any(Path(url.toLocalFile()).exists() for url in urls)
-            if has_paths:
+            if self._drag_has_paths(event):
                 event.acceptProposedAction()
             else:
                 event.ignore()
@@ -1918,17 +2803,21 @@ class AnalyzerWindow(QMainWindow):
     def dragMoveEvent(self, event):
         """ドラッグ移動時の処理（必須）"""
         if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            has_paths = any(Path(url.toLocalFile()).exists() for url in urls)
-            if has_paths:
+            if self._drag_has_paths(event):
                 event.acceptProposedAction()
             else:
                 event.ignore()
         else:
             event.ignore()
+
+    def dragLeaveEvent(self, event):
+        """ドラッグが外れたら存在確認のキャッシュを捨てる"""
+        self._drag_cache = {}
+        event.accept()
     
     def dropEvent(self, event):
         """複数フォルダ/ファイルのドロップ対応"""
+        self._drag_cache = {}
         if not event.mimeData().hasUrls():
             event.ignore()
             return
@@ -1962,6 +2851,7 @@ class AnalyzerWindow(QMainWindow):
         """すべてクリア"""
         reply = QMessageBox.question(self, "確認", "すべてクリアしますか？")
         if reply == QMessageBox.Yes:
+            self._cancel_folder_listings()
             self.folder_tree.clear()
             self.result_tree.clear()
             self.status_bar.showMessage("すべてクリアしました")
@@ -2036,11 +2926,13 @@ class AnalyzerWindow(QMainWindow):
         sort_btn.setObjectName("execute")
         sort_btn.clicked.connect(self._on_sort_clicked)
         row2.addWidget(sort_btn)
+        self._register_operation_button(sort_btn)
         
         flatten_btn = QPushButton("階層削除")
         flatten_btn.setObjectName("execute")
         flatten_btn.clicked.connect(self._on_flatten_clicked)
         row2.addWidget(flatten_btn)
+        self._register_operation_button(flatten_btn)
         
         main_layout.addLayout(row2)
         
@@ -2086,6 +2978,8 @@ class AnalyzerWindow(QMainWindow):
         self.folder_tree.dragEnterEvent = self.folder_tree_drag_enter
         self.folder_tree.dragMoveEvent = self.folder_tree_drag_move
         self.folder_tree.dropEvent = self.folder_tree_drop
+        # サブフォルダの中身は展開時に取得
+        self.folder_tree.itemExpanded.connect(self._on_folder_item_expanded)
         
         layout.addWidget(self.folder_tree)
         
@@ -2196,15 +3090,12 @@ class AnalyzerWindow(QMainWindow):
         folder_count = 0
         file_count_input = 0
         if hasattr(self, "folder_tree"):
+            # 種別は追加時に判定済みの値を使い、ファイルシステムには触れない
             for i in range(self.folder_tree.topLevelItemCount()):
-                item = self.folder_tree.topLevelItem(i)
-                raw = item.data(0, Qt.UserRole)
-                if not raw:
-                    continue
-                p = Path(raw)
-                if p.is_dir():
+                kind = self.folder_tree.topLevelItem(i).data(0, _PATH_KIND_ROLE)
+                if kind == "dir":
                     folder_count += 1
-                elif p.is_file():
+                elif kind == "file":
                     file_count_input += 1
         
         if self.scan_results:
@@ -2227,57 +3118,36 @@ class AnalyzerWindow(QMainWindow):
     def run_analysis(self):
         from pathlib import Path
         items = self.folder_tree.selectedItems()
-        targets: List[Path] = []
 
         def top_root(item):
             while item.parent():
                 item = item.parent()
             return item
 
-        if items:
-            for it in items:
-                raw = it.data(0, Qt.UserRole)
-                if not raw:
-                    continue
-                p = Path(raw)
-                if p.exists():
-                    targets.append(p)
-        else:
-            for i in range(self.folder_tree.topLevelItemCount()):
-                it = self.folder_tree.topLevelItem(i)
-                raw = it.data(0, Qt.UserRole)
-                if not raw:
-                    continue
-                p = Path(raw)
-                if p.exists():
-                    targets.append(p)
+        if not items:
+            items = [self.folder_tree.topLevelItem(i) for i in range(self.folder_tree.topLevelItemCount())]
 
-        # 重複除去
-        deduped = []
+        # UserRole の文字列のまま重複除去し、残ったものだけ stat 1回で種別を判定（Path は最後に作る）
+        dir_targets: List[Path] = []
+        file_targets: List[Path] = []
         seen = set()
-        for p in targets:
-            key = str(p)
-            if key in seen:
+        for it in items:
+            raw = it.data(0, Qt.UserRole)
+            if not raw or raw in seen:
                 continue
-            seen.add(key)
-            deduped.append(p)
-        targets = deduped
+            seen.add(raw)
+            try:
+                mode = os.stat(raw).st_mode
+            except (OSError, ValueError):
+                continue
+            if stat.S_ISDIR(mode):
+                dir_targets.append(Path(raw))
+            elif stat.S_ISREG(mode):
+                file_targets.append(Path(raw))
 
         # ディレクトリが選択されている場合、その配下の個別ファイルは除外して二重集計を防ぐ
-        dir_targets = [p for p in targets if p.is_dir()]
-        file_targets = [p for p in targets if p.is_file()]
-        filtered_files = []
-        for f in file_targets:
-            covered = False
-            for d in dir_targets:
-                try:
-                    f.relative_to(d)
-                    covered = True
-                    break
-                except Exception:
-                    continue
-            if not covered:
-                filtered_files.append(f)
+        prepared_dirs = _prepare_roots(dir_targets)
+        filtered_files = [f for f in file_targets if _root_for_file(f, prepared_dirs) is None]
         targets = dir_targets + filtered_files
 
         if not targets:
@@ -2297,13 +3167,12 @@ class AnalyzerWindow(QMainWindow):
         self.status_bar.showMessage(f"[1/2] ファイル数を計測中… (0/{len(targets)})")
         self.result_tree.clear()
 
-        self.thread = ScannerThread(targets)
+        self.thread = ScannerThread(targets, progress_target=self)
         self.scanner_thread = self.thread
         self.latest_log_path = None
 
         self.thread.scan_started.connect(self.on_scan_started)
         self.thread.counting_progress.connect(self.update_counting_progress)
-        self.thread.progress_updated.connect(self.update_scan_progress)
         self.thread.scan_completed.connect(self.display_scan_results)
         self.thread.scan_cancelled.connect(self.on_scan_cancelled)
         self.thread.error_occurred.connect(self.handle_scan_error)
@@ -2350,6 +3219,11 @@ class AnalyzerWindow(QMainWindow):
             f"[1/2] 計測中: {current_name} ({safe_processed}/{safe_total})"
         )
 
+    @Slot(int, int, str)
+    def _on_progress(self, processed: int, total: int, current_path: str):
+        """ScannerThread からの QMetaObject.invokeMethod による進捗通知"""
+        self.update_scan_progress(processed, total, current_path)
+
     def update_scan_progress(self, processed: int, total: int, current_path: str):
         """スキャンプログレスを更新"""
         if total > 0:
@@ -2386,9 +3260,10 @@ class AnalyzerWindow(QMainWindow):
 
     def on_scan_cancelled(self, stats: Dict[str, Any]):
         """ユーザーによる中止時の処理"""
-        self.scan_results = stats
         if stats:
             self._render_scan_results(stats, show_empty_message=False)
+        else:
+            self._set_scan_results(stats)
 
         message = "解析を中止しました"
         if stats:
@@ -2411,9 +3286,14 @@ class AnalyzerWindow(QMainWindow):
         self.thread = None
         self.scanner_thread = None
 
+    def _set_scan_results(self, stats: Dict[str, Any]):
+        """走査結果を保持し、選択用の索引も作り直す"""
+        self.scan_results = stats
+        self._scan_index = _build_scan_index(stats)
+
     def _render_scan_results(self, stats: Dict[str, Any], show_empty_message: bool = True):
         """結果ツリーを描画"""
-        self.scan_results = stats
+        self._set_scan_results(stats)
         self.result_tree.clear()
 
         if not stats:
@@ -2427,52 +3307,59 @@ class AnalyzerWindow(QMainWindow):
             "document": "📄", "archive": "📦", "other": "📁"
         }
 
-        for media_type, data in stats.items():
-            media_item = QTreeWidgetItem()
-            icon = icon_map.get(media_type, "📁")
-            media_item.setText(0, f"{icon} {media_type.capitalize()}")
-            media_item.setText(1, f"{data['count']:,}")
-
-            size_mb = data['size'] / (1024 * 1024) if data['size'] else 0
-            media_item.setText(2, f"{size_mb:.1f}" if size_mb >= 0.1 else "< 0.1")
-
-            if data['count'] > 0:
-                avg_size = data['size'] // data['count']
-                avg_mb = avg_size / (1024 * 1024)
-                media_item.setText(3, f"{avg_mb:.2f}" if avg_mb >= 0.01 else "< 0.01")
-            else:
-                media_item.setText(3, "0")
-
-            source_folders = data.get('source_folders', [])
-            if source_folders:
-                unique_sources = list(dict.fromkeys(source_folders))
-                tooltip_text = f"ソースフォルダ ({len(unique_sources)}個):\n" + "\n".join(unique_sources[:5])
-                if len(unique_sources) > 5:
-                    tooltip_text += f"\n... 他{len(unique_sources) - 5}個"
-                media_item.setToolTip(0, tooltip_text)
-
-            self.result_tree.addTopLevelItem(media_item)
-
-            if show_details and data.get('extensions'):
-                for ext, count in sorted(data['extensions'].items(), key=lambda x: x[1], reverse=True):
-                    ext_item = QTreeWidgetItem(media_item)
-                    ext_name = ext if ext else "(拡張子なし)"
-                    ext_item.setText(0, f"  📄 {ext_name}")
-                    ext_item.setText(1, f"{count:,}")
-
-                    if data['count'] > 0:
-                        size_ratio = count / data['count']
-                        estimated_total_size = data['size'] * size_ratio
-                        est_mb = estimated_total_size / (1024 * 1024)
-                        ext_item.setText(2, f"{est_mb:.1f}" if est_mb >= 0.1 else "< 0.1")
-
-                        if count > 0:
-                            avg_ext_size = estimated_total_size / count
-                            avg_ext_mb = avg_ext_size / (1024 * 1024)
-                            ext_item.setText(3, f"{avg_ext_mb:.2f}" if avg_ext_mb >= 0.01 else "< 0.01")
-
-        if show_details:
-            self.result_tree.expandAll()
+        # 項目は親に付けない状態で組み立て、再描画を止めてまとめて追加する
+        media_items = []
+        with _suspend_tree_updates(self.result_tree):
+            for media_type, data in stats.items():
+                media_item = QTreeWidgetItem()
+                icon = icon_map.get(media_type, "📁")
+                media_item.setText(0, f"{icon} {media_type.capitalize()}")
+                media_item.setText(1, f"{data['count']:,}")
+
+                size_mb = data['size'] / (1024 * 1024) if data['size'] else 0
+                media_item.setText(2, f"{size_mb:.1f}" if size_mb >= 0.1 else "< 0.1")
+
+                if data['count'] > 0:
+                    avg_size = data['size'] // data['count']
+                    avg_mb = avg_size / (1024 * 1024)
+                    media_item.setText(3, f"{avg_mb:.2f}" if avg_mb >= 0.01 else "< 0.01")
+                else:
+                    media_item.setText(3, "0")
+
+                source_folders = data.get('source_folders', [])
+                if source_folders:
+                    unique_sources = list(dict.fromkeys(source_folders))
+                    tooltip_text = f"ソースフォルダ ({len(unique_sources)}個):\n" + "\n".join(unique_sources[:5])
+                    if len(unique_sources) > 5:
+                        tooltip_text += f"\n... 他{len(unique_sources) - 5}個"
+                    media_item.setToolTip(0, tooltip_text)
+
+                media_items.append(media_item)
+
+                if show_details and data.get('extensions'):
+                    ext_items = []
+                    for ext, count in sorted(data['extensions'].items(), key=lambda x: x[1], reverse=True):
+                        ext_item = QTreeWidgetItem()
+                        ext_items.append(ext_item)
+                        ext_name = ext if ext else "(拡張子なし)"
+                        ext_item.setText(0, f"  📄 {ext_name}")
+                        ext_item.setText(1, f"{count:,}")
+
+                        if data['count'] > 0:
+                            size_ratio = count / data['count']
+                            estimated_total_size = data['size'] * size_ratio
+                            est_mb = estimated_total_size / (1024 * 1024)
+                            ext_item.setText(2, f"{est_mb:.1f}" if est_mb >= 0.1 else "< 0.1")
+
+                            if count > 0:
+                                avg_ext_size = estimated_total_size / count
+                                avg_ext_mb = avg_ext_size / (1024 * 1024)
+                                ext_item.setText(3, f"{avg_ext_mb:.2f}" if avg_ext_mb >= 0.01 else "< 0.01")
+                    media_item.addChildren(ext_items)
+
+            self.result_tree.addTopLevelItems(media_items)
+            if show_details:
+                self.result_tree.expandAll()
 
     def handle_scan_error(self, error_message: str):
         """スキャンエラーを処理"""
@@ -2669,9 +3556,25 @@ class AnalyzerWindow(QMainWindow):
         
     def closeEvent(self, event):
         """ウィンドウクローズ時の処理"""
+        # ファイル操作は途中で止めると不整合になるため、完了を待つか閉じるのをやめる
+        if self._is_operation_running():
+            reply = QMessageBox.question(
+                self, "確認",
+                "ファイル操作を実行中です。\n完了を待ってから閉じますか？",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                event.ignore()
+                return
+            self.operation_thread.wait()
+
         # 実行中のスレッドを停止
         if self.scanner_thread and self.scanner_thread.isRunning():
             self.scanner_thread.terminate()
             self.scanner_thread.wait()
+        self._cancel_folder_listings()
+        for thread in list(self.folder_list_threads):
+            thread.wait()
             
         event.accept()
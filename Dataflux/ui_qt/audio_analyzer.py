@@ -67,6 +67,10 @@ def _save_json(path: Path, data: Dict[str, Any]):
     except Exception:
         pass
 
+# GUI スレッドで回すファイル移動ループの画面更新間隔（N件ごと or 前回から一定ミリ秒経過）
+_UI_REFRESH_EVERY = 64
+_UI_REFRESH_MS = 50
+
 UNKNOWN_DURATION_KEY = "len_unknown"
 
 DEFAULT_DURATION_RANGES = [
@@ -3196,6 +3200,8 @@ class AudioAnalyzerWindow(QMainWindow):
 
         success = 0
         errors = 0
+        ui_tick = QElapsedTimer()
+        ui_tick.start()
         for idx, a in enumerate(actions, start=1):
             src = Path(a["remove_path"])
             if not src.exists():
@@ -3208,9 +3214,10 @@ class AudioAnalyzerWindow(QMainWindow):
             except Exception:
                 errors += 1
 
-            if idx % 20 == 0 or idx == len(actions):
+            if not idx % _UI_REFRESH_EVERY or idx == len(actions) or ui_tick.elapsed() > _UI_REFRESH_MS:
                 self.status_bar.showMessage(f"音声重複整理中... {idx}/{len(actions)}")
                 QApplication.processEvents()
+                ui_tick.restart()
 
         QMessageBox.information(
             self,
@@ -3250,6 +3257,8 @@ class AudioAnalyzerWindow(QMainWindow):
 
         success = 0
         errors = 0
+        ui_tick = QElapsedTimer()
+        ui_tick.start()
         for idx, a in enumerate(actions, start=1):
             src = Path(a["path"])
             if not src.exists():
@@ -3262,9 +3271,10 @@ class AudioAnalyzerWindow(QMainWindow):
             except Exception:
                 errors += 1
 
-            if idx % 20 == 0 or idx == len(actions):
+            if not idx % _UI_REFRESH_EVERY or idx == len(actions) or ui_tick.elapsed() > _UI_REFRESH_MS:
                 self.status_bar.showMessage(f"音声破損候補退避中... {idx}/{len(actions)}")
                 QApplication.processEvents()
+                ui_tick.restart()
 
         QMessageBox.information(
             self,
@@ -41,6 +41,10 @@ from .folder_tools import (
     remove_folders_matching_query,
 )
 
+# GUI スレッドで回すファイル移動ループの画面更新間隔（N件ごと or 前回から一定ミリ秒経過）
+_UI_REFRESH_EVERY = 64
+_UI_REFRESH_MS = 50
+
 # Dot-file handling
 def is_dot_file(path: Path) -> bool:
     """Return True when the file should be treated as dot/metadata file."""
@@ -1969,6 +1973,8 @@ class ImageAnalyzerWindow(QMainWindow):
 
         success = 0
         errors = 0
+        ui_tick = QElapsedTimer()
+        ui_tick.start()
         for idx, a in enumerate(actions, start=1):
             src = Path(a["path"])
             if not src.exists():
@@ -1981,9 +1987,10 @@ class ImageAnalyzerWindow(QMainWindow):
             except Exception:
                 errors += 1
 
-            if idx % 20 == 0 or idx == len(actions):
+            if not idx % _UI_REFRESH_EVERY or idx == len(actions) or ui_tick.elapsed() > _UI_REFRESH_MS:
                 self.status_bar.showMessage(f"破損候補退避中... {idx}/{len(actions)}")
                 QApplication.processEvents()
+                ui_tick.restart()
 
         QMessageBox.information(
             self,
@@ -2106,6 +2113,8 @@ class ImageAnalyzerWindow(QMainWindow):
 
         success = 0
         errors = 0
+        ui_tick = QElapsedTimer()
+        ui_tick.start()
         for idx, a in enumerate(actions, start=1):
             src = Path(a["remove_path"])
             if not src.exists():
@@ -2118,9 +2127,10 @@ class ImageAnalyzerWindow(QMainWindow):
             except Exception:
                 errors += 1
 
-            if idx % 20 == 0 or idx == len(actions):
+            if not idx % _UI_REFRESH_EVERY or idx == len(actions) or ui_tick.elapsed() > _UI_REFRESH_MS:
                 self.status_bar.showMessage(f"重複整理中... {idx}/{len(actions)}")
                 QApplication.processEvents()
+                ui_tick.restart()
 
         QMessageBox.information(
             self,